@@ -0,0 +1,772 @@
+import logging
+import AWConfig
+import CompiledInputs
+import DefenseConfig
+import DefenderCounterConfig
+import ModelDomains
+import ModelProfiler
+import RosterSet
+
+from ortools.sat.python import cp_model
+
+'''
+1. A "CHAMPION" is an integer, lower bound 1, upper bound is not permanently fixed but around 250.
+2. 10 "ROSTERS" of champions are specified. A roster must have at least 3 champions. The same champion can exist in 
+ multiple rosters. Each roster can only have one of a given champion. e.g.: 
+ legal: roster 1 has champions 2,3,4,5. roster 2 has champions 4,5,6. 
+ illegal: roster 1 has champions 2,2,3
+3. There are 10 "TEAMS" with a 1 to 1 mapping to the 10 rosters. Each team has exactly 3 champions assigned. 
+ A team can only consist of champions from its corresponding roster. A team cannot have duplicate champions. Different
+ teams can have the same champion, if the corresponding rosters all have that champion.
+4. The purpose of the teams/champions is to attack "DEFENDERS". Defenders are a concept that is not directly modeled.
+ Following are descriptions of other concepts associated with defenders that are modeled.
+5. 50 defenders are specified. All defenders are unique.
+6. Each defender is associated with a set of up to 5 unique specified champions, called "VALID COUNTERS".
+7. The 50 defenders each belong to one of a small number (~15) of "DEFENSE SECTIONS" of size 1-4. Each defender exists
+ in one and only one defense section. Each defense section has a sequence number. Multiple defense sections may have the 
+ same sequence number. A defense section may optionally also have a “side” number.
+8. Every defender is associated with an attacking team and an attacking champion. The attacking team
+ must be one of the 10 teams described above. The attacking champion must be one of the 3 champions on that team.
+ The attacking champion must be equal to one of the valid counters for the defender. A champion may be assigned as the
+ attacker for more than one defender.
+9. Defenders in different defense sections with the same sequence number cannot be assigned the same attacking team. 
+ For any 2 defense sections with specified, distinct side numbers: the assigned attacking team for the defenders in one 
+ defense section cannot be the same as the assigned attacking team for defenders in the other defense section.
+'''
+
+_STATUS_BY_NAME = {
+    'UNKNOWN': cp_model.UNKNOWN,
+    'MODEL_INVALID': cp_model.MODEL_INVALID,
+    'FEASIBLE': cp_model.FEASIBLE,
+    'INFEASIBLE': cp_model.INFEASIBLE,
+    'OPTIMAL': cp_model.OPTIMAL
+}
+
+
+class AttackModel:
+    _model: cp_model.CpModel
+    _aw_config: AWConfig.AWConfig
+    _defense_config: DefenseConfig.DefenseConfig
+    _roster_set: RosterSet.RosterSet
+    _counter_config: DefenderCounterConfig.DefenderCounterConfig
+    _domains: ModelDomains.ModelDomains
+    _inputs: CompiledInputs.CompiledInputs
+    _roster_ids: list
+    _section_names: list
+    _teams: list
+    _defender_assignments: dict[int, dict[str, cp_model.IntVar]]
+    _defender_team_ass_checks: dict[str, dict[int, dict[int, cp_model.IntVar]]]
+    _section_roster_ass_checks: dict[str, dict[int, cp_model.IntVar]]
+    _att_roster_ass_checks: dict[str, dict[int, dict[int, dict[int, cp_model.IntVar]]]]
+    _editable: bool
+    _break_symmetry: bool
+    _constraint_groups: dict[tuple, list]
+    _retired_literal: cp_model.IntVar
+    _num_retired: int
+
+    def __init__(self, aw_config: AWConfig.AWConfig, defense_config: DefenseConfig.DefenseConfig,
+                 roster_set: RosterSet.RosterSet, counter_config: DefenderCounterConfig.DefenderCounterConfig,
+                 domains: ModelDomains.ModelDomains, editable: bool = False, break_symmetry: bool = False,
+                 inputs: CompiledInputs.CompiledInputs = None):
+        self._model = cp_model.CpModel()
+        self._aw_config = aw_config
+        self._defense_config = defense_config
+        self._roster_set = roster_set
+        self._counter_config = counter_config
+        self._domains = domains
+        if inputs is None:
+            inputs = CompiledInputs.compile_inputs(aw_config, defense_config, roster_set, counter_config)
+        self._inputs = inputs
+        self._roster_ids = roster_set.get_all_roster_ids()
+        self._section_names = defense_config.get_all_sections()
+        self._teams = []
+        self._defender_assignments = {}
+        self._defender_team_ass_checks = {}
+        self._section_roster_ass_checks = {}
+        self._att_roster_ass_checks = {}
+        self._editable = editable
+        self._break_symmetry = break_symmetry
+        self._constraint_groups = {}
+        self._retired_literal = None
+        self._num_retired = 0
+
+    def get_model(self) -> cp_model.CpModel:
+        return self._model
+
+    def get_aw_config(self) -> AWConfig.AWConfig:
+        return self._aw_config
+
+    def get_defense_config(self) -> DefenseConfig.DefenseConfig:
+        return self._defense_config
+
+    def get_roster_set(self) -> RosterSet.RosterSet:
+        return self._roster_set
+
+    def get_counter_config(self) -> DefenderCounterConfig.DefenderCounterConfig:
+        return self._counter_config
+
+    def get_domains(self) -> ModelDomains.ModelDomains:
+        return self._domains
+
+    def get_inputs(self) -> CompiledInputs.CompiledInputs:
+        return self._inputs
+
+    def get_roster_ids(self) -> list:
+        return self._roster_ids.copy()
+
+    def get_section_names(self) -> list:
+        return self._section_names.copy()
+
+    def get_teams(self) -> list:
+        return self._teams
+
+    def get_defender_assignments(self) -> dict[int, dict[str, cp_model.IntVar]]:
+        return self._defender_assignments
+
+    def get_defender_team_ass_checks(self) -> dict[str, dict[int, dict[int, cp_model.IntVar]]]:
+        return self._defender_team_ass_checks
+
+    def get_section_roster_ass_checks(self) -> dict[str, dict[int, cp_model.IntVar]]:
+        return self._section_roster_ass_checks
+
+    def get_att_roster_ass_checks(self) -> dict[str, dict[int, dict[int, dict[int, cp_model.IntVar]]]]:
+        return self._att_roster_ass_checks
+
+    def is_editable(self) -> bool:
+        # editable models keep domains in constraints rather than in the variables, so update_attack_model() can
+        #  change them
+        return self._editable
+
+    def add_to_group(self, group_key: tuple, constraint: cp_model.Constraint):
+        # constraints are grouped by what they depend on (eg ('node', 12), ('sequence', 3)), so a group can be retired
+        #  and rebuilt when its inputs change
+        if group_key in self._constraint_groups:
+            self._constraint_groups[group_key].append(constraint)
+        else:
+            self._constraint_groups[group_key] = [constraint]
+
+    def retire_group(self, group_key: tuple):
+        # cp-sat constraints can't be removed, but a constraint only enforced by a literal fixed to false does nothing
+        #  and is dropped in presolve
+        constraints = self._constraint_groups.pop(group_key, [])
+        if not constraints:
+            return
+        if self._retired_literal is None:
+            self._retired_literal = self._model.NewBoolVar("retired")
+            self._model.Add(self._retired_literal == 0)
+        for constraint in constraints:
+            constraint.OnlyEnforceIf(self._retired_literal)
+            self._num_retired += 1
+
+    def get_group_keys(self) -> list:
+        return list(self._constraint_groups.keys())
+
+    def get_group_constraints(self, group_key: tuple) -> list:
+        return self._constraint_groups.get(group_key, []).copy()
+
+    def get_num_retired(self) -> int:
+        return self._num_retired
+
+    def get_retired_literal(self) -> cp_model.IntVar:
+        # None until the first group is retired
+        return self._retired_literal
+
+    def set_retired_literal(self, retired_literal: cp_model.IntVar, num_retired: int):
+        # for models whose cp-sat model was loaded rather than built, so later retirements reuse the same literal
+        self._retired_literal = retired_literal
+        self._num_retired = num_retired
+
+    def set_configs(self, defense_config: DefenseConfig.DefenseConfig, roster_set: RosterSet.RosterSet,
+                    counter_config: DefenderCounterConfig.DefenderCounterConfig):
+        # swaps in edited configs. update_attack_model() then brings the model up to date with them, or tells the
+        #  caller to rebuild if they can't be patched in
+        self._defense_config = defense_config
+        self._roster_set = roster_set
+        self._counter_config = counter_config
+
+    def set_domains(self, domains: ModelDomains.ModelDomains):
+        self._domains = domains
+
+    def set_inputs(self, inputs: CompiledInputs.CompiledInputs):
+        # the previous inputs are what update_attack_model() compares the edited configs to
+        self._inputs = inputs
+
+    def is_breaking_symmetry(self) -> bool:
+        return self._break_symmetry
+
+
+class AttackSolution:
+    _status: int
+    _status_name: str
+    _wall_time: float
+    _teams: dict[int, list]
+    _assignments: dict[int, dict[str, int]]
+    _objective_value: float
+
+    def __init__(self, status: int, status_name: str, wall_time: float, teams: dict[int, list] = None,
+                 assignments: dict[int, dict[str, int]] = None, objective_value: float = None):
+        self._status = status
+        self._status_name = status_name
+        self._wall_time = wall_time
+        self._teams = teams if teams else {}
+        self._assignments = assignments if assignments else {}
+        self._objective_value = objective_value
+
+    def get_status(self) -> int:
+        return self._status
+
+    def get_status_name(self) -> str:
+        return self._status_name
+
+    def get_wall_time(self) -> float:
+        return self._wall_time
+
+    def is_feasible(self) -> bool:
+        return self._status == cp_model.FEASIBLE or self._status == cp_model.OPTIMAL
+
+    def get_objective_value(self) -> float:
+        # None if the model had no objective
+        return self._objective_value
+
+    def get_team(self, roster_id: int) -> list:
+        if roster_id not in self._teams:
+            logging.error("No team in solution for roster id {}".format(roster_id))
+            raise ValueError("Unknown roster id")
+
+        return self._teams[roster_id].copy()
+
+    def get_all_teams(self) -> dict[int, list]:
+        return {roster_id: champs.copy() for roster_id, champs in self._teams.items()}
+
+    def get_node_assignment(self, node_id: int) -> dict[str, int]:
+        if node_id not in self._assignments:
+            logging.error("No assignment in solution for node {}".format(node_id))
+            raise ValueError("Unknown node id")
+
+        return self._assignments[node_id].copy()
+
+    def get_all_assignments(self) -> dict[int, dict[str, int]]:
+        return {node_id: assignment.copy() for node_id, assignment in self._assignments.items()}
+
+
+def _domain_from_values(values: list) -> cp_model.Domain:
+    # an empty domain makes the model invalid rather than infeasible, so empty value lists get a placeholder domain.
+    #  callers are responsible for making the model infeasible in that case
+    if not values:
+        return cp_model.Domain(0, 0)
+
+    return cp_model.Domain.FromValues(values)
+
+
+def _add_team_domain(attack_model: AttackModel, roster_id: int):
+    # only allow champs from the respective roster. in a non-editable model this is already the slot var domain
+    model = attack_model.get_model()
+    team_domain = attack_model.get_domains().get_team_domain(roster_id)
+    if len(team_domain) < attack_model.get_aw_config().get_team_size():
+        # not enough champs to fill the team
+        attack_model.add_to_group(('team', roster_id), model.AddBoolOr([]))
+    if attack_model.is_editable() and team_domain:
+        for slot in attack_model.get_teams()[roster_id]:
+            attack_model.add_to_group(('team', roster_id),
+                                      model.AddLinearExpressionInDomain(slot, cp_model.Domain.FromValues(team_domain)))
+
+
+def _add_teams(attack_model: AttackModel):
+    # construct teams, with domains only allowing champs from the respective roster and ensuring all 3 team members
+    #  are different
+    model = attack_model.get_model()
+    all_champions = attack_model.get_aw_config().get_all_champions()
+    team_size = attack_model.get_aw_config().get_team_size()
+    domains = attack_model.get_domains()
+    teams = attack_model.get_teams()
+    for roster_id in attack_model.get_roster_ids():
+        if attack_model.is_editable():
+            slot_domain = cp_model.Domain(min(all_champions), max(all_champions))
+        else:
+            slot_domain = _domain_from_values(domains.get_team_domain(roster_id))
+        team_champs = list()
+        for jj in range(team_size):
+            team_champs.append(model.NewIntVarFromDomain(slot_domain, "team {} - slot {}".format(roster_id, jj)))
+        # TODO eventually support different rarities. for now, all champs must be unique
+        model.AddAllDifferent(team_champs)
+        teams.append(team_champs)
+        _add_team_domain(attack_model, roster_id)
+
+
+def _add_defender_assignments(attack_model: AttackModel):
+    # attacker/team assignments for defenders, along with valid counter constraints
+    #  the domains only hold counters that some roster has, and rosters that have at least one counter. an editable
+    #  model keeps them in the node constraints instead
+    model = attack_model.get_model()
+    num_champions = attack_model.get_aw_config().get_num_champions()
+    inputs = attack_model.get_inputs()
+    domains = attack_model.get_domains()
+    defender_assignments = attack_model.get_defender_assignments()
+    for section_name in attack_model.get_section_names():
+        for node in inputs.get_section_nodes(section_name):
+            if attack_model.is_editable():
+                attacker_domain = cp_model.Domain(1, num_champions)
+                team_domain = cp_model.Domain(0, len(attack_model.get_roster_ids()) - 1)
+            else:
+                attacker_domain = _domain_from_values(domains.get_attacker_domain(node))
+                team_domain = _domain_from_values(domains.get_node_rosters(node))
+            defender_assignments[node] = {}
+            defender_assignments[node]['attacker'] = \
+                model.NewIntVarFromDomain(attacker_domain, "{}-node{}-att".format(section_name, node))
+            # do not use roster ids here, just the index of the roster in the roster list
+            defender_assignments[node]['team'] = \
+                model.NewIntVarFromDomain(team_domain, "{}-node{}-team".format(section_name, node))
+
+
+def _add_node_team_check(attack_model: AttackModel, section_name: str, node: int, roster_id: int):
+    # bool to tell if a defender is assigned to a particular team. these hold whatever the inputs are, so they are not
+    #  in a group
+    model = attack_model.get_model()
+    node_team = attack_model.get_defender_assignments()[node]['team']
+    dtac = model.NewBoolVar("{} node {} assigned to team {}?".format(section_name, node, roster_id))
+    attack_model.get_defender_team_ass_checks()[section_name][node][roster_id] = dtac
+    model.Add(node_team == roster_id).OnlyEnforceIf(dtac)
+    model.Add(node_team != roster_id).OnlyEnforceIf(dtac.Not())
+
+
+def _add_node_constraints(attack_model: AttackModel, section_name: str, node: int):
+    model = attack_model.get_model()
+    node_dtacs = attack_model.get_defender_team_ass_checks()[section_name][node]
+    # every defender gets exactly one team. this is implied by the team var domain, but it is also what makes the
+    #  model infeasible for a node no roster can attack
+    attack_model.add_to_group(('node', node), model.AddExactlyOne(node_dtacs.values()))
+    if attack_model.is_editable():
+        domains = attack_model.get_domains()
+        node_vars = attack_model.get_defender_assignments()[node]
+        attacker_domain = domains.get_attacker_domain(node)
+        if attacker_domain:
+            attack_model.add_to_group(('node', node), model.AddLinearExpressionInDomain(
+                node_vars['attacker'], cp_model.Domain.FromValues(attacker_domain)))
+        node_rosters = domains.get_node_rosters(node)
+        if node_rosters:
+            attack_model.add_to_group(('node', node), model.AddLinearExpressionInDomain(
+                node_vars['team'], cp_model.Domain.FromValues(node_rosters)))
+        else:
+            # the team checks left over from earlier inputs would still let the node be attacked
+            attack_model.add_to_group(('node', node), model.AddBoolOr([]))
+
+
+def _add_section_team_check(attack_model: AttackModel, section_name: str, roster_id: int):
+    # broader bool ("SRAC") to tell if any defender in a section is assigned to a particular team. creates the srac
+    #  if it doesn't exist yet
+    model = attack_model.get_model()
+    section_roster_ass_checks = attack_model.get_section_roster_ass_checks()
+    if roster_id not in section_roster_ass_checks[section_name]:
+        section_roster_ass_checks[section_name][roster_id] = \
+            model.NewBoolVar("team {} traveling to {}?".format(roster_id, section_name))
+    srac = section_roster_ass_checks[section_name][roster_id]
+    section_dtacs = attack_model.get_defender_team_ass_checks()[section_name]
+    node_dtacs = list(section_dtacs[node][roster_id] for node in section_dtacs if roster_id in section_dtacs[node])
+    # OnlyEnforceIf() doesn't return the constraint in every ortools version, so keep hold of it first
+    any_constraint = model.AddBoolOr(node_dtacs)
+    any_constraint.OnlyEnforceIf(srac)
+    none_constraint = model.AddBoolAnd(list(dtac.Not() for dtac in node_dtacs))
+    none_constraint.OnlyEnforceIf(srac.Not())
+    attack_model.add_to_group(('section', section_name, roster_id), any_constraint)
+    attack_model.add_to_group(('section', section_name, roster_id), none_constraint)
+
+
+def _add_section_team_checks(attack_model: AttackModel):
+    # DEFENSE GROUP TEAM ASSIGNMENT CONSISTENCY CHECKS
+    #  checks only exist for (node, roster) and (section, roster) pairs that survived domain pruning, every other pair
+    #  is known to be unassigned
+    inputs = attack_model.get_inputs()
+    domains = attack_model.get_domains()
+    defender_team_ass_checks = attack_model.get_defender_team_ass_checks()
+    for section_name in attack_model.get_section_names():
+        defender_team_ass_checks[section_name] = {}
+        for node in inputs.get_section_nodes(section_name):
+            defender_team_ass_checks[section_name][node] = {}
+            for roster_id in domains.get_node_rosters(node):
+                _add_node_team_check(attack_model, section_name, node, roster_id)
+            _add_node_constraints(attack_model, section_name, node)
+    section_roster_ass_checks = attack_model.get_section_roster_ass_checks()
+    for section_name in attack_model.get_section_names():
+        section_roster_ass_checks[section_name] = {}
+        for roster_id in domains.get_section_rosters(section_name):
+            _add_section_team_check(attack_model, section_name, roster_id)
+
+
+def _add_attacker_team_check(attack_model: AttackModel, section_name: str, node: int, roster_id: int):
+    # ATTACKER ASSIGNMENT/TEAM MEMBERSHIP consistency checks. like the node team checks these always hold
+    model = attack_model.get_model()
+    team_size = attack_model.get_aw_config().get_team_size()
+    team = attack_model.get_teams()[roster_id]
+    node_attacker = attack_model.get_defender_assignments()[node]['attacker']
+    node_arac = {}
+    attack_model.get_att_roster_ass_checks()[section_name][node][roster_id] = node_arac
+    for slot in range(team_size):
+        # check if attacker assignment for a defender in a particular section matches a particular team member
+        arac = model.NewBoolVar("{} node {} attacker matches team {} slot {}?"
+                                .format(section_name, node, roster_id, slot))
+        node_arac[slot] = arac
+        model.Add(node_attacker == team[slot]).OnlyEnforceIf(arac)
+        # NO constraint for the inverse, because the same champ can be on multiple teams, so it's ok to have an
+        #  assigned attacked match a member on team x even if team x is not assigned
+    # an attacker assignment must match one of the attackers on team x if team x was assigned
+    model.AddBoolOr(list(node_arac[slot] for slot in range(team_size))) \
+        .OnlyEnforceIf(attack_model.get_defender_team_ass_checks()[section_name][node][roster_id])
+    # NO constraint for the inverse, because the same champ can be on multiple teams, so we could have a assigned
+    #  attacker match a member on team x even if team x is not assigned
+
+
+def _add_attacker_team_checks(attack_model: AttackModel):
+    inputs = attack_model.get_inputs()
+    att_roster_ass_checks = attack_model.get_att_roster_ass_checks()
+    for section_name in attack_model.get_section_names():
+        att_roster_ass_checks[section_name] = {}
+        for node in inputs.get_section_nodes(section_name):
+            att_roster_ass_checks[section_name][node] = {}
+            for roster_id in attack_model.get_domains().get_node_rosters(node):
+                _add_attacker_team_check(attack_model, section_name, node, roster_id)
+
+
+def _add_sequence_group(attack_model: AttackModel, seq_num: int, seq_sections: list):
+    # the same team cannot be assigned to any 2 nodes in different defense groups with the same sequence number
+    model = attack_model.get_model()
+    section_roster_ass_checks = attack_model.get_section_roster_ass_checks()
+    # if we look at the set of the section team assignments checks for this team, for all sections with this sequence
+    #  number - at most 1 of the check vars can be true.
+    for roster_id in attack_model.get_roster_ids():
+        # assemble the set of section roster assignment checks for this team for all sections with this seq number
+        srac_bools = list(section_roster_ass_checks[section_name][roster_id] for section_name in seq_sections
+                          if roster_id in section_roster_ass_checks[section_name])
+        # a single section in the seq num can't conflict with anything
+        if len(srac_bools) > 1:
+            attack_model.add_to_group(('sequence', seq_num), model.AddAtMostOne(srac_bools))
+
+
+def _add_sequence_num_constraints(attack_model: AttackModel):
+    # sequence number constraints
+    sections_by_seq_num = attack_model.get_inputs().get_sections_by_seq_num()
+    for seq_num in sections_by_seq_num:
+        _add_sequence_group(attack_model, seq_num, sections_by_seq_num[seq_num])
+
+
+def _add_side_num_constraints(attack_model: AttackModel):
+    # side number constraints
+    model = attack_model.get_model()
+    section_roster_ass_checks = attack_model.get_section_roster_ass_checks()
+    sections_by_side_num = attack_model.get_inputs().get_sections_by_side_num()
+    side_num_lst = list(sections_by_side_num.keys())
+    # a team cannot be assigned to any 2 defense sections with different side numbers
+    #  go through every pair of side numbers and make sure no assignments exist for each team for each section with
+    #  the other side number, if there is an assigment for that team in a section with the "current" side num. each
+    #  pair of side numbers is its own group
+    for ii in range(len(side_num_lst) - 1):
+        cur_sections = sections_by_side_num[side_num_lst[ii]]
+        for other_side_num in side_num_lst[ii + 1:]:
+            other_sections = sections_by_side_num[other_side_num]
+            group_key = ('side', side_num_lst[ii], other_side_num)
+            for roster_id in attack_model.get_roster_ids():
+                other_sections_srac_bools = list(section_roster_ass_checks[section_name][roster_id]
+                                                 for section_name in other_sections
+                                                 if roster_id in section_roster_ass_checks[section_name])
+                if not other_sections_srac_bools:
+                    continue
+                for section_name in cur_sections:
+                    if roster_id not in section_roster_ass_checks[section_name]:
+                        continue
+                    # if this team is assigned to a section with current side num, make sure all sections with the
+                    #  other side num are NOT assigned to the team
+                    constraint = model.AddBoolAnd(list(x.Not() for x in other_sections_srac_bools))
+                    constraint.OnlyEnforceIf(section_roster_ass_checks[section_name][roster_id])
+                    attack_model.add_to_group(group_key, constraint)
+
+
+def _add_lex_less_equal(model: cp_model.CpModel, lhs: list, rhs: list, name: str) -> list:
+    # lhs <= rhs lexicographically. prefix_eq[ii] is true iff the first ii elements of both lists are equal, and a
+    #  pair of elements only has to be ordered if everything before it is equal. returns the ordering constraints
+    constraints = []
+    prefix_eq = []
+    for ii in range(len(lhs)):
+        constraint = model.Add(lhs[ii] <= rhs[ii])
+        constraint.OnlyEnforceIf(prefix_eq)
+        constraints.append(constraint)
+        if ii == len(lhs) - 1:
+            break
+        elem_eq = model.NewBoolVar("{} elem {} equal?".format(name, ii))
+        model.Add(lhs[ii] == rhs[ii]).OnlyEnforceIf(elem_eq)
+        model.Add(lhs[ii] != rhs[ii]).OnlyEnforceIf(elem_eq.Not())
+        prefix_eq = prefix_eq + [elem_eq]
+
+    return constraints
+
+
+def _add_identical_roster_order(attack_model: AttackModel):
+    # teams built from identical rosters are interchangeable (along with the nodes assigned to them), so keep the teams
+    #  of each group of identical rosters in lexicographic order
+    model = attack_model.get_model()
+    domains = attack_model.get_domains()
+    teams = attack_model.get_teams()
+    rosters_by_champs: dict[tuple, list] = {}
+    for roster_id in attack_model.get_roster_ids():
+        champs = tuple(domains.get_team_domain(roster_id))
+        if champs in rosters_by_champs:
+            rosters_by_champs[champs].append(roster_id)
+        else:
+            rosters_by_champs[champs] = [roster_id]
+    for identical_rosters in rosters_by_champs.values():
+        for ii in range(len(identical_rosters) - 1):
+            lhs_id = identical_rosters[ii]
+            rhs_id = identical_rosters[ii + 1]
+            for constraint in _add_lex_less_equal(model, teams[lhs_id], teams[rhs_id],
+                                                  "team {} <= team {}".format(lhs_id, rhs_id)):
+                attack_model.add_to_group(('symmetry',), constraint)
+
+
+def _add_symmetry_breaking(attack_model: AttackModel):
+    # symmetry breaking. these constraints only remove solutions that are equivalent to one that is kept
+    model = attack_model.get_model()
+    # the slots within a team are interchangeable, so keep them in increasing order. this also implies all different
+    for team_champs in attack_model.get_teams():
+        for slot in range(len(team_champs) - 1):
+            model.Add(team_champs[slot] < team_champs[slot + 1])
+    _add_identical_roster_order(attack_model)
+
+
+def build_attack_model(aw_config: AWConfig.AWConfig, defense_config: DefenseConfig.DefenseConfig,
+                       roster_set: RosterSet.RosterSet, counter_config: DefenderCounterConfig.DefenderCounterConfig,
+                       break_symmetry: bool = False, profiler: ModelProfiler.ModelProfiler = None,
+                       editable: bool = False) -> AttackModel:
+    # prune (node, roster) pairs and champion domains before creating any variables
+    with ModelProfiler.phase(profiler, 'domain_pruning'):
+        inputs = CompiledInputs.compile_inputs(aw_config, defense_config, roster_set, counter_config)
+        domains = ModelDomains.compute_model_domains(aw_config, defense_config, roster_set, counter_config, inputs)
+    if not domains.is_feasible():
+        logging.error("infeasible before solving: nodes {}, rosters {}"
+                      .format(domains.get_infeasible_nodes(), domains.get_infeasible_rosters()))
+    attack_model = AttackModel(aw_config, defense_config, roster_set, counter_config, domains, editable, break_symmetry,
+                               inputs)
+    model = attack_model.get_model()
+    with ModelProfiler.phase(profiler, 'team', model):
+        _add_teams(attack_model)
+    with ModelProfiler.phase(profiler, 'counter', model):
+        _add_defender_assignments(attack_model)
+    with ModelProfiler.phase(profiler, 'section_consistency', model):
+        _add_section_team_checks(attack_model)
+    with ModelProfiler.phase(profiler, 'attacker_consistency', model):
+        _add_attacker_team_checks(attack_model)
+    with ModelProfiler.phase(profiler, 'sequence', model):
+        _add_sequence_num_constraints(attack_model)
+    with ModelProfiler.phase(profiler, 'side', model):
+        _add_side_num_constraints(attack_model)
+    if break_symmetry:
+        with ModelProfiler.phase(profiler, 'symmetry', model):
+            _add_symmetry_breaking(attack_model)
+
+    return attack_model
+
+
+def update_attack_model(attack_model: AttackModel) -> bool:
+    # brings an editable model up to date after its rosters, node counters or section sequence/side numbers were edited
+    #  in place, by retiring and rebuilding only the constraint groups whose inputs changed. returns False if the model
+    #  can't be updated (not editable, or rosters, sections or nodes were added or removed), in which case it has to be
+    #  rebuilt
+    if not attack_model.is_editable():
+        return False
+    defense_config = attack_model.get_defense_config()
+    roster_set = attack_model.get_roster_set()
+    defender_team_ass_checks = attack_model.get_defender_team_ass_checks()
+    section_roster_ass_checks = attack_model.get_section_roster_ass_checks()
+    if roster_set.get_all_roster_ids() != attack_model.get_roster_ids() or \
+            defense_config.get_all_sections() != attack_model.get_section_names():
+        return False
+    for section_name in attack_model.get_section_names():
+        if sorted(defense_config.get_section(section_name).get_nodes()) != \
+                sorted(defender_team_ass_checks[section_name].keys()):
+            return False
+
+    old_domains = attack_model.get_domains()
+    old_inputs = attack_model.get_inputs()
+    inputs = CompiledInputs.compile_inputs(attack_model.get_aw_config(), defense_config, roster_set,
+                                           attack_model.get_counter_config())
+    domains = ModelDomains.compute_model_domains(attack_model.get_aw_config(), defense_config, roster_set,
+                                                 attack_model.get_counter_config(), inputs)
+    if not domains.is_feasible():
+        logging.error("infeasible before solving: nodes {}, rosters {}"
+                      .format(domains.get_infeasible_nodes(), domains.get_infeasible_rosters()))
+    attack_model.set_domains(domains)
+    attack_model.set_inputs(inputs)
+
+    changed_rosters = list(roster_id for roster_id in attack_model.get_roster_ids()
+                           if old_domains.get_team_domain(roster_id) != domains.get_team_domain(roster_id))
+    for roster_id in changed_rosters:
+        attack_model.retire_group(('team', roster_id))
+        _add_team_domain(attack_model, roster_id)
+    if changed_rosters and attack_model.is_breaking_symmetry():
+        attack_model.retire_group(('symmetry',))
+        _add_identical_roster_order(attack_model)
+
+    # nodes whose attackers or usable rosters changed. newly usable (node, roster) pairs get their checks, and the
+    #  section check for that roster has to include them. pairs that are no longer usable keep their checks, which the
+    #  node's team domain now forces to false
+    changed_section_rosters = set()
+    for section_name in attack_model.get_section_names():
+        for node in inputs.get_section_nodes(section_name):
+            if old_domains.get_attacker_domain(node) == domains.get_attacker_domain(node) and \
+                    old_domains.get_node_rosters(node) == domains.get_node_rosters(node):
+                continue
+            for roster_id in domains.get_node_rosters(node):
+                if roster_id not in defender_team_ass_checks[section_name][node]:
+                    _add_node_team_check(attack_model, section_name, node, roster_id)
+                    _add_attacker_team_check(attack_model, section_name, node, roster_id)
+                    changed_section_rosters.add((section_name, roster_id))
+            attack_model.retire_group(('node', node))
+            _add_node_constraints(attack_model, section_name, node)
+    # sections that got a brand new section check also need it in their sequence and side constraints
+    sections_with_new_checks = set()
+    for section_name, roster_id in changed_section_rosters:
+        if roster_id not in section_roster_ass_checks[section_name]:
+            sections_with_new_checks.add(section_name)
+        attack_model.retire_group(('section', section_name, roster_id))
+        _add_section_team_check(attack_model, section_name, roster_id)
+
+    affected_seq_nums = set()
+    side_changed = False
+    for section_name in attack_model.get_section_names():
+        old_seq_num = old_inputs.get_sequence_num(section_name)
+        old_side_num = old_inputs.get_side_num(section_name)
+        seq_num = inputs.get_sequence_num(section_name)
+        if old_seq_num != seq_num or section_name in sections_with_new_checks:
+            affected_seq_nums.update([old_seq_num, seq_num])
+        if old_side_num != inputs.get_side_num(section_name) or \
+                (section_name in sections_with_new_checks and DefenseConfig.is_valid_side_num(old_side_num)):
+            side_changed = True
+    sections_by_seq_num = inputs.get_sections_by_seq_num()
+    for seq_num in affected_seq_nums:
+        attack_model.retire_group(('sequence', seq_num))
+        if seq_num in sections_by_seq_num:
+            _add_sequence_group(attack_model, seq_num, sections_by_seq_num[seq_num])
+    if side_changed:
+        for group_key in attack_model.get_group_keys():
+            if group_key[0] == 'side':
+                attack_model.retire_group(group_key)
+        _add_side_num_constraints(attack_model)
+
+    return True
+
+
+def add_solution_hint(attack_model: AttackModel, solution: AttackSolution):
+    # hint the model with a previous solution. the solution may come from slightly different inputs, so values that
+    #  are no longer in a variable's domain, and teams/nodes that no longer exist, are skipped. replaces any previous
+    #  hint
+    model = attack_model.get_model()
+    model.ClearHints()
+    domains = attack_model.get_domains()
+    teams = attack_model.get_teams()
+    hint_teams = solution.get_all_teams()
+    for roster_id in attack_model.get_roster_ids():
+        if roster_id not in hint_teams:
+            continue
+        team_domain = domains.get_team_domain(roster_id)
+        for slot, champ in zip(teams[roster_id], hint_teams[roster_id]):
+            if champ in team_domain:
+                model.AddHint(slot, champ)
+    hint_assignments = solution.get_all_assignments()
+    for node, node_vars in attack_model.get_defender_assignments().items():
+        if node not in hint_assignments:
+            continue
+        if domains.is_node_roster_usable(node, hint_assignments[node]['team']):
+            model.AddHint(node_vars['team'], hint_assignments[node]['team'])
+        if hint_assignments[node]['attacker'] in domains.get_attacker_domain(node):
+            model.AddHint(node_vars['attacker'], hint_assignments[node]['attacker'])
+
+
+def extract_solution(attack_model: AttackModel, solver: cp_model.CpSolver, status: int) -> AttackSolution:
+    teams = {}
+    assignments = {}
+    objective_value = None
+    if status == cp_model.FEASIBLE or status == cp_model.OPTIMAL:
+        attack_teams = attack_model.get_teams()
+        for ii, roster_id in enumerate(attack_model.get_roster_ids()):
+            teams[roster_id] = list(solver.Value(slot) for slot in attack_teams[ii])
+        for node, node_vars in attack_model.get_defender_assignments().items():
+            assignments[node] = {'team': solver.Value(node_vars['team']),
+                                 'attacker': solver.Value(node_vars['attacker'])}
+        if attack_model.get_model().HasObjective():
+            objective_value = solver.ObjectiveValue()
+
+    return AttackSolution(status, solver.StatusName(status), solver.WallTime(), teams, assignments, objective_value)
+
+
+def solve_attack_model(attack_model: AttackModel, time_limit: float = None, num_workers: int = None,
+                       solver: cp_model.CpSolver = None, relative_gap: float = None,
+                       solution_callback: cp_model.CpSolverSolutionCallback = None,
+                       profiler: ModelProfiler.ModelProfiler = None) -> AttackSolution:
+    # the model is not modified by solving, so the same attack model can be solved as many times as needed.
+    #  relative_gap only matters for models with an objective: the solve stops once the best solution is within that
+    #  fraction of the best bound
+    if solver is None:
+        solver = cp_model.CpSolver()
+    if time_limit is not None:
+        solver.parameters.max_time_in_seconds = time_limit
+    if num_workers is not None:
+        solver.parameters.num_workers = num_workers
+    if relative_gap is not None:
+        solver.parameters.relative_gap_limit = relative_gap
+    if profiler is None:
+        status = solver.Solve(attack_model.get_model(), solution_callback)
+    else:
+        ModelProfiler.prepare_solver(solver)
+        with profiler.phase('solve'):
+            status = solver.Solve(attack_model.get_model(), solution_callback)
+        profiler.record_solve_stats(solver, status)
+
+    return extract_solution(attack_model, solver, status)
+
+
+def solution_to_json_data(solution: AttackSolution) -> dict:
+    # same layout style as the input files: lists of entries keyed by id, since json keys can only be strings
+    teams = solution.get_all_teams()
+    assignments = solution.get_all_assignments()
+    json_data = {
+        'status': solution.get_status_name(),
+        'wall_time': solution.get_wall_time(),
+        'teams': list({'roster_id': roster_id, 'champs': teams[roster_id]} for roster_id in teams),
+        'assignments': list({'node_id': node_id, 'team': assignments[node_id]['team'],
+                             'attacker': assignments[node_id]['attacker']} for node_id in assignments)
+    }
+    if solution.get_objective_value() is not None:
+        json_data['objective_value'] = solution.get_objective_value()
+
+    return json_data
+
+
+def solution_from_json_data(json_data: dict) -> AttackSolution:
+    status_name = json_data['status']
+    teams = {}
+    for team_entry in json_data['teams']:
+        teams[int(team_entry['roster_id'])] = list(team_entry['champs'])
+    assignments = {}
+    for assignment_entry in json_data['assignments']:
+        assignments[int(assignment_entry['node_id'])] = {'team': int(assignment_entry['team']),
+                                                         'attacker': int(assignment_entry['attacker'])}
+
+    return AttackSolution(_STATUS_BY_NAME[status_name], status_name,
+                          json_data['wall_time'], teams, assignments, json_data.get('objective_value'))
+
+
+def print_solution(attack_model: AttackModel, solution: AttackSolution):
+    print("status: {}, time: {} s".format(solution.get_status_name(), solution.get_wall_time()))
+    if solution.get_objective_value() is not None:
+        print("objective: {}".format(solution.get_objective_value()))
+    if solution.is_feasible():
+        for roster_id in attack_model.get_roster_ids():
+            print("team {}:".format(roster_id))
+            for champ in solution.get_team(roster_id):
+                print("\t{}".format(champ))
+        print("")
+
+        inputs = attack_model.get_inputs()
+        for section_name in attack_model.get_section_names():
+            print("section {}:".format(section_name))
+            for node in inputs.get_section_nodes(section_name):
+                node_assignment = solution.get_node_assignment(node)
+                print("\tnode {}: team {}, attacker {}".format(node, node_assignment['team'],
+                                                               node_assignment['attacker']))
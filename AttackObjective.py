@@ -0,0 +1,122 @@
+import json
+import logging
+import AttackModel
+
+from ortools.sat.python import cp_model
+
+
+class ObjectiveConfig:
+    # weights of each objective term, all minimized. a weight of 0 leaves the term out of the model
+    _distinct_teams_weight: int
+    _counter_rank_weight: int
+    _load_balance_weight: int
+
+    def __init__(self, distinct_teams_weight: int = 0, counter_rank_weight: int = 0, load_balance_weight: int = 0):
+        self._distinct_teams_weight = distinct_teams_weight
+        self._counter_rank_weight = counter_rank_weight
+        self._load_balance_weight = load_balance_weight
+
+    def get_distinct_teams_weight(self) -> int:
+        # number of distinct teams used per sequence number, summed over sequence numbers
+        return self._distinct_teams_weight
+
+    def get_counter_rank_weight(self) -> int:
+        # position of each node's attacker in its counters list (0 is the best counter), summed over nodes
+        return self._counter_rank_weight
+
+    def get_load_balance_weight(self) -> int:
+        # number of nodes assigned to the busiest team
+        return self._load_balance_weight
+
+    def is_empty(self) -> bool:
+        return not (self._distinct_teams_weight or self._counter_rank_weight or self._load_balance_weight)
+
+
+def load_objective_config_from_file(filename: str) -> ObjectiveConfig:
+    with open(filename) as f:
+        json_data = json.load(f)
+
+    return ObjectiveConfig(int(json_data.get('distinct_teams_weight', 0)),
+                           int(json_data.get('counter_rank_weight', 0)),
+                           int(json_data.get('load_balance_weight', 0)))
+
+
+def _distinct_teams_term(attack_model: AttackModel.AttackModel) -> cp_model.LinearExpr:
+    # a team can be in at most one section per sequence number, so the number of distinct teams per sequence number is
+    #  just the number of (section, team) pairs in use
+    section_roster_ass_checks = attack_model.get_section_roster_ass_checks()
+    return sum(srac for section_name in section_roster_ass_checks
+               for srac in section_roster_ass_checks[section_name].values())
+
+
+def _counter_rank_term(attack_model: AttackModel.AttackModel) -> cp_model.LinearExpr:
+    model = attack_model.get_model()
+    inputs = attack_model.get_inputs()
+    domains = attack_model.get_domains()
+    ranks = []
+    for node, node_vars in attack_model.get_defender_assignments().items():
+        counters = inputs.get_node_counters(node)
+        rank_tuples = list((champ, counters.index(champ)) for champ in domains.get_attacker_domain(node))
+        if not rank_tuples:
+            continue
+        rank = model.NewIntVar(0, len(counters) - 1, "node {} counter rank".format(node))
+        # the rank table limits the attacker, so it has to go when the objective is replaced
+        attack_model.add_to_group(('objective',), model.AddAllowedAssignments([node_vars['attacker'], rank],
+                                                                               rank_tuples))
+        ranks.append(rank)
+
+    return sum(ranks)
+
+
+def _load_balance_term(attack_model: AttackModel.AttackModel) -> cp_model.LinearExpr:
+    model = attack_model.get_model()
+    defender_team_ass_checks = attack_model.get_defender_team_ass_checks()
+    num_nodes = len(attack_model.get_defender_assignments())
+    loads = []
+    for roster_id in attack_model.get_roster_ids():
+        load = model.NewIntVar(0, num_nodes, "team {} load".format(roster_id))
+        # grouped with the objective, so replacing the objective doesn't leave a set of these behind every time
+        attack_model.add_to_group(('objective',), model.Add(
+            load == sum(node_dtacs[roster_id] for section_dtacs in defender_team_ass_checks.values()
+                        for node_dtacs in section_dtacs.values() if roster_id in node_dtacs)))
+        loads.append(load)
+    max_load = model.NewIntVar(0, num_nodes, "max team load")
+    attack_model.add_to_group(('objective',), model.AddMaxEquality(max_load, loads))
+
+    return max_load
+
+
+def add_objective(attack_model: AttackModel.AttackModel, objective_config: ObjectiveConfig):
+    # replaces any objective already on the model
+    model = attack_model.get_model()
+    attack_model.retire_group(('objective',))
+    terms = []
+    if objective_config.get_distinct_teams_weight():
+        terms.append(objective_config.get_distinct_teams_weight() * _distinct_teams_term(attack_model))
+    if objective_config.get_counter_rank_weight():
+        terms.append(objective_config.get_counter_rank_weight() * _counter_rank_term(attack_model))
+    if objective_config.get_load_balance_weight():
+        terms.append(objective_config.get_load_balance_weight() * _load_balance_term(attack_model))
+    if not terms:
+        logging.warning("objective config has no weights set, model stays a feasibility problem")
+        model.ClearObjective()
+        return
+
+    model.Minimize(sum(terms))
+
+
+class ObjectiveProgressCallback(cp_model.CpSolverSolutionCallback):
+    # calls on_progress(objective value, best bound, wall time) for every improving solution the solver finds. logs
+    #  progress by default
+    _on_progress: callable
+
+    def __init__(self, on_progress: callable = None):
+        cp_model.CpSolverSolutionCallback.__init__(self)
+        self._on_progress = on_progress
+
+    def on_solution_callback(self):
+        if self._on_progress is None:
+            logging.info("objective {}, bound {}, time {} s".format(self.ObjectiveValue(), self.BestObjectiveBound(),
+                                                                    self.WallTime()))
+        else:
+            self._on_progress(self.ObjectiveValue(), self.BestObjectiveBound(), self.WallTime())
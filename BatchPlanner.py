@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+import argparse
+import concurrent.futures
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import time
+import AWConfig
+import AttackModel
+import DefenseConfig
+import DefenderCounterConfig
+import ModelSnapshot
+import RosterSet
+import SolutionCache
+
+
+class Scenario:
+    _name: str
+    _defense_config_file: str
+
+    def __init__(self, name: str, defense_config_file: str):
+        self._name = name
+        self._defense_config_file = defense_config_file
+
+    def get_name(self) -> str:
+        return self._name
+
+    def get_defense_config_file(self) -> str:
+        return self._defense_config_file
+
+
+def load_scenarios_from_dir(dirname: str) -> list:
+    # every json file in the directory is a defense config, named after the file
+    scenarios = []
+    for filename in sorted(glob.glob(os.path.join(dirname, '*.json'))):
+        name = os.path.splitext(os.path.basename(filename))[0]
+        scenarios.append(Scenario(name, filename))
+
+    return scenarios
+
+
+def load_scenarios_from_manifest(filename: str) -> list:
+    # defense config paths in the manifest are relative to the manifest itself
+    scenarios = []
+    with open(filename) as f:
+        json_data = json.load(f)
+
+    manifest_dir = os.path.dirname(os.path.abspath(filename))
+    for scenario_entry in json_data['scenarios']:
+        defense_config_file = os.path.join(manifest_dir, scenario_entry['defense_config'])
+        if 'name' in scenario_entry:
+            name = scenario_entry['name']
+        else:
+            name = os.path.splitext(os.path.basename(defense_config_file))[0]
+        scenarios.append(Scenario(name, defense_config_file))
+
+    return scenarios
+
+
+def split_cores(num_scenarios: int, num_cores: int = None, pool_size: int = None,
+                solver_workers: int = None) -> tuple[int, int]:
+    # independent scenarios scale better than cp-sat workers within a solve, so by default use one process per core
+    #  (up to the number of scenarios) and give each solve an even share of what is left
+    if num_cores is None:
+        num_cores = os.cpu_count() or 1
+    if pool_size is None:
+        if solver_workers is None:
+            pool_size = max(1, min(num_scenarios, num_cores))
+        else:
+            pool_size = max(1, min(num_scenarios, num_cores // solver_workers))
+    if solver_workers is None:
+        solver_workers = max(1, num_cores // pool_size)
+
+    return pool_size, solver_workers
+
+
+# rosters and counters are shared by every scenario, so each worker process loads them once
+_worker_state: dict = {}
+
+
+def _init_worker(num_champions: int, roster_set_file: str, counters_file: str, cache_dir: str,
+                 snapshot_file: str):
+    _worker_state['cache'] = SolutionCache.SolutionCache(cache_dir) if cache_dir else None
+    _worker_state['snapshot'] = None
+    if snapshot_file:
+        # parsed once per worker, each scenario patches a copy of it. the snapshot carries the rosters and counters the
+        #  model was built with
+        _worker_state['snapshot'] = ModelSnapshot.read_snapshot(snapshot_file)
+        aw_config, _, roster_set, counter_config = _worker_state['snapshot'].get_configs()
+        _worker_state['aw_config'] = aw_config
+        _worker_state['roster_set'] = roster_set
+        _worker_state['counter_config'] = counter_config
+    else:
+        _worker_state['aw_config'] = AWConfig.AWConfig(num_champions)
+        _worker_state['roster_set'] = RosterSet.load_roster_set_from_file(roster_set_file)
+        _worker_state['counter_config'] = DefenderCounterConfig.load_counters_from_file(counters_file)
+
+
+def _solve_scenario(scenario: Scenario, time_limit: float, solver_workers: int) -> dict:
+    start_time = time.perf_counter()
+    defense_config = DefenseConfig.load_defense_config_from_file(scenario.get_defense_config_file())
+    snapshot = _worker_state['snapshot']
+
+    def build_model() -> AttackModel.AttackModel:
+        if snapshot is not None:
+            return ModelSnapshot.model_from_snapshot(snapshot, defense_config)
+        return AttackModel.build_attack_model(_worker_state['aw_config'], defense_config, _worker_state['roster_set'],
+                                              _worker_state['counter_config'])
+
+    if _worker_state['cache']:
+        solution = SolutionCache.cached_solve(_worker_state['cache'], _worker_state['aw_config'], defense_config,
+                                              _worker_state['roster_set'], _worker_state['counter_config'],
+                                              time_limit, solver_workers, build_model)
+    else:
+        solution = AttackModel.solve_attack_model(build_model(), time_limit, solver_workers)
+
+    result = {'scenario': scenario.get_name(), 'total_time': time.perf_counter() - start_time}
+    result.update(AttackModel.solution_to_json_data(solution))
+    return result
+
+
+def run_batch(scenarios: list, num_champions: int, roster_set_file: str, counters_file: str, output_file: str,
+              pool_size: int = None, solver_workers: int = None, time_limit: float = None,
+              cache_dir: str = None, snapshot_file: str = None) -> int:
+    # solves all scenarios and appends one json line per scenario to the output file as soon as it finishes, in
+    #  completion order. returns the number of scenarios that produced a solution. with a snapshot file (see
+    #  ModelSnapshot), the rosters and counters come from the snapshot and each scenario is patched into its model
+    pool_size, solver_workers = split_cores(len(scenarios), pool_size=pool_size, solver_workers=solver_workers)
+    logging.info("solving {} scenarios with {} processes, {} solver workers each"
+                 .format(len(scenarios), pool_size, solver_workers))
+
+    num_solved = 0
+    # ortools starts threads on import, so use fresh processes rather than forking this one
+    mp_context = multiprocessing.get_context('spawn')
+    init_args = (num_champions, roster_set_file, counters_file, cache_dir, snapshot_file)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=pool_size, mp_context=mp_context,
+                                                initializer=_init_worker, initargs=init_args) as pool, \
+            open(output_file, 'a') as f:
+        futures = {pool.submit(_solve_scenario, scenario, time_limit, solver_workers): scenario
+                   for scenario in scenarios}
+        for future in concurrent.futures.as_completed(futures):
+            scenario = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logging.error("scenario {} failed: {}".format(scenario.get_name(), e))
+                result = {'scenario': scenario.get_name(), 'status': 'ERROR', 'error': str(e)}
+            if result['status'] == 'FEASIBLE' or result['status'] == 'OPTIMAL':
+                num_solved += 1
+            logging.info("scenario {}: {}".format(scenario.get_name(), result['status']))
+            f.write(json.dumps(result) + '\n')
+            f.flush()
+
+    return num_solved
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)-8s %(funcName)s:%(message)s',
+                        level=logging.INFO,
+                        datefmt='%Y-%m-%d %H:%M:%S')
+
+    parser = argparse.ArgumentParser(description="solve many defense configs against the same rosters and counters")
+    scenario_source = parser.add_mutually_exclusive_group(required=True)
+    scenario_source.add_argument('--scenario-dir', help="directory of defense config json files")
+    scenario_source.add_argument('--manifest', help="json manifest listing defense config files")
+    parser.add_argument('--rosters', default='rosterset-1.json', help="roster set json file")
+    parser.add_argument('--counters', default='defendercounter-1.json', help="defender counters json file")
+    parser.add_argument('--num-champions', type=int, default=250)
+    parser.add_argument('--output', default='batch-results.jsonl', help="jsonl file results are appended to")
+    parser.add_argument('--pool-size', type=int, help="number of scenarios solved at once")
+    parser.add_argument('--solver-workers', type=int, help="cp-sat workers per scenario")
+    parser.add_argument('--time-limit', type=float, help="time limit per scenario, in seconds")
+    parser.add_argument('--cache-dir', help="solution cache directory, shared between runs")
+    parser.add_argument('--snapshot',
+                        help="model snapshot to patch the scenarios into, instead of the roster and counter files")
+    args = parser.parse_args()
+
+    if args.scenario_dir:
+        batch_scenarios = load_scenarios_from_dir(args.scenario_dir)
+    else:
+        batch_scenarios = load_scenarios_from_manifest(args.manifest)
+    solved = run_batch(batch_scenarios, args.num_champions, args.rosters, args.counters, args.output,
+                       args.pool_size, args.solver_workers, args.time_limit, args.cache_dir, args.snapshot)
+    print("solved {} of {} scenarios".format(solved, len(batch_scenarios)))
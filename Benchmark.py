@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import AttackModel
+import InstanceGenerator
+import ModelProfiler
+
+# (num rosters, num nodes) from a typical war up to the biggest maps we expect
+DEFAULT_SIZES = [(10, 50), (15, 75), (20, 100), (25, 125), (30, 150)]
+
+# build phases, as named by build_attack_model(), summed into the build time
+_BUILD_PHASES = ['domain_pruning', 'team', 'counter', 'section_consistency', 'attacker_consistency', 'sequence', 'side',
+                 'symmetry']
+
+
+def _run_case(spec_args: dict, time_limit: float, break_symmetry: bool) -> dict:
+    # runs in its own process, so peak memory is for this case only
+    spec = InstanceGenerator.InstanceSpec(**spec_args)
+    start_time = time.perf_counter()
+    aw_config, defense_config, roster_set, counter_config = InstanceGenerator.generate_instance(spec)
+    generate_time = time.perf_counter() - start_time
+
+    profiler = ModelProfiler.ModelProfiler()
+    attack_model = AttackModel.build_attack_model(aw_config, defense_config, roster_set, counter_config,
+                                                  break_symmetry, profiler)
+    solution = AttackModel.solve_attack_model(attack_model, time_limit, profiler=profiler)
+
+    phases = profiler.get_phases()
+    size = ModelProfiler.model_size(attack_model.get_model())
+    return {
+        'case': spec.get_name(),
+        'spec': spec_args,
+        'status': solution.get_status_name(),
+        'generate_time': generate_time,
+        'build_time': sum(x['time'] for x in phases if x['phase'] in _BUILD_PHASES),
+        'solve_time': solution.get_wall_time(),
+        'presolve_time': profiler.get_solve_stats()['presolve_time'],
+        'num_variables': size['num_variables'],
+        'num_constraints': size['num_constraints'],
+        'peak_memory_kb': ModelProfiler.peak_memory_kb()
+    }
+
+
+def run_benchmark(sizes: list, seeds: list, time_limit: float, break_symmetry: bool = False,
+                  include_infeasible: bool = True) -> list:
+    spec_args_list = []
+    for num_rosters, num_nodes in sizes:
+        for feasible in ([True, False] if include_infeasible else [True]):
+            for seed in seeds:
+                spec_args_list.append({'num_rosters': num_rosters, 'num_nodes': num_nodes, 'feasible': feasible,
+                                       'seed': seed})
+
+    results = []
+    # one case at a time in a fresh process: cases don't compete for cores, and each gets its own peak memory
+    mp_context = multiprocessing.get_context('spawn')
+    with mp_context.Pool(processes=1, maxtasksperchild=1) as pool:
+        for spec_args in spec_args_list:
+            result = pool.apply(_run_case, (spec_args, time_limit, break_symmetry))
+            logging.info("{}: {}, build {:.3f} s, solve {:.3f} s, peak {} KB"
+                         .format(result['case'], result['status'], result['build_time'], result['solve_time'],
+                                 result['peak_memory_kb']))
+            results.append(result)
+
+    return results
+
+
+def compare_to_baseline(results: list, baseline: dict, tolerance: float = 1.5, min_delta: float = 0.05) -> list:
+    # returns a description of every regression: a status change, or a build/solve time that grew by more than the
+    #  tolerance factor and by more than min_delta seconds (so timer noise on tiny cases doesn't count)
+    regressions = []
+    for result in results:
+        if result['case'] not in baseline:
+            continue
+        base = baseline[result['case']]
+        if result['status'] != base['status']:
+            regressions.append("{}: status {} -> {}".format(result['case'], base['status'], result['status']))
+        for key in ['build_time', 'solve_time']:
+            if result[key] > base[key] * tolerance and result[key] - base[key] > min_delta:
+                regressions.append("{}: {} {:.3f} s -> {:.3f} s".format(result['case'], key, base[key], result[key]))
+
+    return regressions
+
+
+def print_results(results: list, baseline: dict = None):
+    print("{:<28} {:<11} {:>9} {:>9} {:>8} {:>10}".format('case', 'status', 'build s', 'solve s', 'vars', 'peak KB'))
+    for result in results:
+        print("{:<28} {:<11} {:>9.3f} {:>9.3f} {:>8} {:>10}".format(result['case'], result['status'],
+                                                                   result['build_time'], result['solve_time'],
+                                                                   result['num_variables'], result['peak_memory_kb']))
+        if baseline and result['case'] in baseline:
+            base = baseline[result['case']]
+            print("{:<28} {:<11} {:>9.3f} {:>9.3f} {:>8} {:>10}".format('  baseline', base['status'],
+                                                                       base['build_time'], base['solve_time'],
+                                                                       base['num_variables'], base['peak_memory_kb']))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)-8s %(funcName)s:%(message)s',
+                        level=logging.INFO,
+                        datefmt='%Y-%m-%d %H:%M:%S')
+
+    parser = argparse.ArgumentParser(description="build and solve synthetic instances across a size sweep")
+    parser.add_argument('--sizes', help="comma separated rosters:nodes pairs, eg 10:50,30:150")
+    parser.add_argument('--seeds', type=int, default=1, help="number of instances per size")
+    parser.add_argument('--time-limit', type=float, default=60.0, help="solve time limit per case, in seconds")
+    parser.add_argument('--break-symmetry', action='store_true')
+    parser.add_argument('--feasible-only', action='store_true')
+    parser.add_argument('--output', help="json file for the results")
+    parser.add_argument('--baseline', default='benchmark-baseline.json', help="baseline json file to compare to")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=1.5, help="slowdown factor that counts as a regression")
+    args = parser.parse_args()
+
+    if args.sizes:
+        bench_sizes = list(tuple(int(x) for x in pair.split(':')) for pair in args.sizes.split(','))
+    else:
+        bench_sizes = DEFAULT_SIZES
+    bench_results = run_benchmark(bench_sizes, list(range(args.seeds)), args.time_limit, args.break_symmetry,
+                                  not args.feasible_only)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(bench_results, f, indent=2)
+
+    baseline_results = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline_results = {x['case']: x for x in json.load(f)}
+    print_results(bench_results, baseline_results)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(bench_results, f, indent=2)
+        print("saved baseline to {}".format(args.baseline))
+    elif baseline_results:
+        found_regressions = compare_to_baseline(bench_results, baseline_results, args.tolerance)
+        for regression in found_regressions:
+            print("REGRESSION {}".format(regression))
+        if found_regressions:
+            sys.exit(1)
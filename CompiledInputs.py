@@ -0,0 +1,164 @@
+import logging
+import types
+import AWConfig
+import DefenseConfig
+import DefenderCounterConfig
+import RosterSet
+
+
+def champs_to_bits(champs, num_champions: int) -> int:
+    # bit c is set for every valid champ c. champs outside 1..num_champions are left out
+    bits = 0
+    for champ in champs:
+        if 1 <= champ <= num_champions:
+            bits |= 1 << champ
+
+    return bits
+
+
+def bits_to_list(bits: int) -> list:
+    # set bits in ascending order, so champ bitsets come back as sorted champ lists and roster bitsets as roster ids
+    return list(index for index, bit in enumerate(bin(bits)[:1:-1]) if bit == '1')
+
+
+class CompiledInputs:
+    # read-only snapshot of the rosters, counters and sections, indexed for the lookups model building does over and
+    #  over. everything is a tuple, an int bitset or a read-only mapping, so getters hand out the stored object instead
+    #  of a copy. rebuild it with compile_inputs() after editing the configs
+    __slots__ = ('_num_champions', '_roster_ids', '_roster_champs', '_roster_bits', '_all_roster_bits',
+                 '_champ_rosters', '_node_counters', '_node_bits', '_section_names', '_section_nodes', '_node_section',
+                 '_section_nums', '_sections_by_seq_num', '_sections_by_side_num')
+    _num_champions: int
+    _roster_ids: tuple
+    _roster_champs: tuple
+    _roster_bits: tuple
+    _all_roster_bits: int
+    _champ_rosters: tuple
+    _node_counters: types.MappingProxyType
+    _node_bits: types.MappingProxyType
+    _section_names: tuple
+    _section_nodes: types.MappingProxyType
+    _node_section: types.MappingProxyType
+    _section_nums: types.MappingProxyType
+    _sections_by_seq_num: types.MappingProxyType
+    _sections_by_side_num: types.MappingProxyType
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields[name[1:]])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("compiled inputs are read-only")
+
+    def get_num_champions(self) -> int:
+        return self._num_champions
+
+    def get_roster_ids(self) -> tuple:
+        return self._roster_ids
+
+    def get_roster_champs(self, roster_id: int) -> tuple:
+        # sorted valid champs of the roster
+        return self._roster_champs[roster_id]
+
+    def get_roster_bits(self, roster_id: int) -> int:
+        return self._roster_bits[roster_id]
+
+    def get_all_roster_bits(self) -> int:
+        # every champ held by at least one roster
+        return self._all_roster_bits
+
+    def roster_has_champ(self, roster_id: int, champ: int) -> bool:
+        return champ >= 0 and (self._roster_bits[roster_id] >> champ) & 1 == 1
+
+    def get_champ_rosters(self, champ: int) -> int:
+        # bitset of the rosters holding this champ
+        if not 1 <= champ <= self._num_champions:
+            return 0
+        return self._champ_rosters[champ]
+
+    def get_node_ids(self) -> tuple:
+        return tuple(self._node_counters.keys())
+
+    def get_node_counters(self, node_id: int) -> tuple:
+        # counters in their configured order, so index is the counter's rank
+        return self._node_counters[node_id]
+
+    def get_node_bits(self, node_id: int) -> int:
+        # bitset of the node's valid counters
+        return self._node_bits[node_id]
+
+    def get_section_names(self) -> tuple:
+        return self._section_names
+
+    def get_section_nodes(self, section_name: str) -> tuple:
+        return self._section_nodes[section_name]
+
+    def get_node_section(self, node_id: int) -> str:
+        return self._node_section[node_id]
+
+    def get_sequence_num(self, section_name: str) -> int:
+        return self._section_nums[section_name][0]
+
+    def get_side_num(self, section_name: str) -> int:
+        return self._section_nums[section_name][1]
+
+    def get_sections_by_seq_num(self) -> types.MappingProxyType:
+        # sequence num -> section names, in section order
+        return self._sections_by_seq_num
+
+    def get_sections_by_side_num(self) -> types.MappingProxyType:
+        # valid side num -> section names, in section order. sections without a side num are left out
+        return self._sections_by_side_num
+
+
+def compile_inputs(aw_config: AWConfig.AWConfig, defense_config: DefenseConfig.DefenseConfig,
+                   roster_set: RosterSet.RosterSet,
+                   counter_config: DefenderCounterConfig.DefenderCounterConfig) -> CompiledInputs:
+    num_champions = aw_config.get_num_champions()
+    roster_ids = tuple(roster_set.get_all_roster_ids())
+    roster_champs = tuple(tuple(sorted(set(champ for champ in roster_set.get_roster(roster_id)
+                                           if 1 <= champ <= num_champions)))
+                          for roster_id in roster_ids)
+    roster_bits = tuple(champs_to_bits(champs, num_champions) for champs in roster_champs)
+    all_roster_bits = 0
+    champ_rosters = [0] * (num_champions + 1)
+    for roster_id in roster_ids:
+        all_roster_bits |= roster_bits[roster_id]
+        for champ in roster_champs[roster_id]:
+            champ_rosters[champ] |= 1 << roster_id
+
+    section_names = tuple(defense_config.get_all_sections())
+    section_nodes = {}
+    node_section = {}
+    section_nums = {}
+    sections_by_seq_num: dict[int, list] = {}
+    sections_by_side_num: dict[int, list] = {}
+    node_counters = {}
+    node_bits = {}
+    for section_name in section_names:
+        section = defense_config.get_section(section_name)
+        section_nodes[section_name] = tuple(section.get_nodes())
+        section_nums[section_name] = (section.get_sequence_num(), section.get_side_num())
+        sections_by_seq_num.setdefault(section.get_sequence_num(), []).append(section_name)
+        if DefenseConfig.is_valid_side_num(section.get_side_num()):
+            sections_by_side_num.setdefault(section.get_side_num(), []).append(section_name)
+        for node in section_nodes[section_name]:
+            if node in node_section:
+                logging.error("node {} is in both {} and {}".format(node, node_section[node], section_name))
+                raise ValueError("Duplicate node id")
+            node_section[node] = section_name
+            node_counters[node] = tuple(counter_config.get_node_counters(node))
+            node_bits[node] = champs_to_bits(node_counters[node], num_champions)
+
+    return CompiledInputs(num_champions=num_champions, roster_ids=roster_ids,
+                          roster_champs=roster_champs,
+                          roster_bits=roster_bits, all_roster_bits=all_roster_bits, champ_rosters=tuple(champ_rosters),
+                          node_counters=types.MappingProxyType(node_counters),
+                          node_bits=types.MappingProxyType(node_bits), section_names=section_names,
+                          section_nodes=types.MappingProxyType(section_nodes),
+                          node_section=types.MappingProxyType(node_section),
+                          section_nums=types.MappingProxyType(section_nums),
+                          sections_by_seq_num=types.MappingProxyType({x: tuple(y)
+                                                                      for x, y in sections_by_seq_num.items()}),
+                          sections_by_side_num=types.MappingProxyType({x: tuple(y)
+                                                                       for x, y in sections_by_side_num.items()}))
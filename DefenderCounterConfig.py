@@ -18,6 +18,13 @@ class DefenderCounterConfig:
 
         self._data[node_id] = counters
 
+    def update_counters(self, node_id: int, counters: list):
+        if node_id not in self._data.keys():
+            logging.error("No such node id {}".format(node_id))
+            raise ValueError("Unknown node id")
+
+        self._data[node_id] = counters
+
     def get_node_ids(self) -> list:
         return list(self._data.keys())
 
@@ -30,10 +37,15 @@ class DefenderCounterConfig:
 
 
 def load_counters_from_file(filename: str) -> DefenderCounterConfig:
-    defender_counter_config = DefenderCounterConfig()
     with open(filename) as f:
         json_data = json.load(f)
 
+    return counters_from_json_data(json_data)
+
+
+def counters_from_json_data(json_data: dict) -> DefenderCounterConfig:
+    # same layout as the defender counter files
+    defender_counter_config = DefenderCounterConfig()
     counter_data = json_data['defender_counters']
     for counter_entry in counter_data:
         node_id = int(counter_entry['node_id'])
@@ -43,6 +55,12 @@ def load_counters_from_file(filename: str) -> DefenderCounterConfig:
     return defender_counter_config
 
 
+def counters_to_json_data(counter_config: DefenderCounterConfig) -> dict:
+    # same layout as the defender counter files
+    return {'defender_counters': list({'node_id': node_id, 'counters': counter_config.get_node_counters(node_id)}
+                                      for node_id in counter_config.get_node_ids())}
+
+
 if __name__ == '__main__':
     logging.basicConfig(format='%(asctime)s %(levelname)-8s %(funcName)s:%(message)s',
                         level=logging.INFO,
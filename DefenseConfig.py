@@ -21,6 +21,12 @@ class SectionConfig:
     def get_side_num(self) -> int:
         return self._side_num
 
+    def set_sequence_num(self, sequence_num: int):
+        self._sequence_num = sequence_num
+
+    def set_side_num(self, side_num: int):
+        self._side_num = side_num
+
 
 def is_valid_side_num(side_num: int) -> bool:
     return side_num >= 0
@@ -54,10 +60,15 @@ class DefenseConfig:
 
 
 def load_defense_config_from_file(filename: str) -> DefenseConfig:
-    defense_config = DefenseConfig()
     with open(filename) as f:
         json_data = json.load(f)
 
+    return defense_config_from_json_data(json_data)
+
+
+def defense_config_from_json_data(json_data: dict) -> DefenseConfig:
+    # same layout as the defense config files
+    defense_config = DefenseConfig()
     for section_name in json_data:
         nodes = json_data[section_name]['nodes']
         sequence_num = json_data[section_name]['sequence_num']
@@ -70,6 +81,18 @@ def load_defense_config_from_file(filename: str) -> DefenseConfig:
     return defense_config
 
 
+def defense_config_to_json_data(defense_config: DefenseConfig) -> dict:
+    # same layout as the defense config files, so defense_config_from_json_data() reads it back
+    json_data = {}
+    for section_name in defense_config.get_all_sections():
+        section = defense_config.get_section(section_name)
+        json_data[section_name] = {'nodes': section.get_nodes(), 'sequence_num': section.get_sequence_num()}
+        if is_valid_side_num(section.get_side_num()):
+            json_data[section_name]['side_num'] = section.get_side_num()
+
+    return json_data
+
+
 if __name__ == '__main__':
     logging.basicConfig(format='%(asctime)s %(levelname)-8s %(funcName)s:%(message)s',
                         level=logging.INFO,
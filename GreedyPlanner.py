@@ -0,0 +1,158 @@
+import logging
+import random
+import time
+import AWConfig
+import AttackModel
+import DefenseConfig
+import DefenderCounterConfig
+import ModelDomains
+import RosterSet
+
+from ortools.sat.python import cp_model
+
+
+class _GreedyState:
+    # partial plan built up one node at a time
+    _team_size: int
+    _teams: dict[int, list]
+    _sections_by_roster: dict[int, set]
+    _assignments: dict[int, dict[str, int]]
+
+    def __init__(self, roster_ids: list, team_size: int):
+        self._team_size = team_size
+        self._teams = {roster_id: [] for roster_id in roster_ids}
+        self._sections_by_roster = {roster_id: set() for roster_id in roster_ids}
+        self._assignments = {}
+
+    def can_use(self, defense_config: DefenseConfig.DefenseConfig, section_name: str, roster_id: int,
+                champ: int) -> bool:
+        if champ not in self._teams[roster_id] and len(self._teams[roster_id]) >= self._team_size:
+            return False
+        section = defense_config.get_section(section_name)
+        for other_section_name in self._sections_by_roster[roster_id]:
+            if other_section_name == section_name:
+                continue
+            other_section = defense_config.get_section(other_section_name)
+            if other_section.get_sequence_num() == section.get_sequence_num():
+                return False
+            if DefenseConfig.is_valid_side_num(section.get_side_num()) and \
+                    DefenseConfig.is_valid_side_num(other_section.get_side_num()) and \
+                    section.get_side_num() != other_section.get_side_num():
+                return False
+
+        return True
+
+    def assign(self, section_name: str, node: int, roster_id: int, champ: int):
+        if champ not in self._teams[roster_id]:
+            self._teams[roster_id].append(champ)
+        self._sections_by_roster[roster_id].add(section_name)
+        self._assignments[node] = {'team': roster_id, 'attacker': champ}
+
+    def get_team(self, roster_id: int) -> list:
+        return self._teams[roster_id]
+
+    def get_num_sections(self, roster_id: int) -> int:
+        return len(self._sections_by_roster[roster_id])
+
+    def is_section_using(self, section_name: str, roster_id: int) -> bool:
+        return section_name in self._sections_by_roster[roster_id]
+
+    def get_assignments(self) -> dict[int, dict[str, int]]:
+        return self._assignments
+
+
+def _greedy_pass(defense_config: DefenseConfig.DefenseConfig, roster_ids: list, team_size: int,
+                 node_candidates: list, rnd: random.Random) -> _GreedyState:
+    state = _GreedyState(roster_ids, team_size)
+    # most constrained nodes first, with random tie breaking between passes
+    ordered = sorted(node_candidates, key=lambda x: (len(x[2]), rnd.random()))
+    for section_name, node, candidates in ordered:
+        best = None
+        best_score = None
+        for roster_id, champ in candidates:
+            if not state.can_use(defense_config, section_name, roster_id, champ):
+                continue
+            # prefer reusing a team already travelling to this section, then reusing a champ already on the team, then
+            #  the team tied to the fewest sections so far
+            score = (not state.is_section_using(section_name, roster_id), champ not in state.get_team(roster_id),
+                     state.get_num_sections(roster_id), rnd.random())
+            if best_score is None or score < best_score:
+                best = (roster_id, champ)
+                best_score = score
+        if best is not None:
+            state.assign(section_name, node, best[0], best[1])
+
+    return state
+
+
+def plan_greedy(aw_config: AWConfig.AWConfig, defense_config: DefenseConfig.DefenseConfig,
+                roster_set: RosterSet.RosterSet, counter_config: DefenderCounterConfig.DefenderCounterConfig,
+                time_limit: float = 0.5, seed: int = 0) -> AttackModel.AttackSolution:
+    # randomized greedy with restarts, stopping at the first complete plan or when the time limit runs out. returns a
+    #  FEASIBLE solution for a complete plan, otherwise an UNKNOWN solution holding the pass that assigned the most
+    #  nodes, which is still useful as a partial hint
+    start_time = time.perf_counter()
+    team_size = aw_config.get_team_size()
+    domains = ModelDomains.compute_model_domains(aw_config, defense_config, roster_set, counter_config)
+    node_candidates = []
+    for section_name in defense_config.get_all_sections():
+        for node in defense_config.get_section(section_name).get_nodes():
+            attackers = domains.get_attacker_domain(node)
+            candidates = list((roster_id, champ) for roster_id in domains.get_node_rosters(node)
+                              for champ in domains.get_team_domain(roster_id) if champ in attackers)
+            node_candidates.append((section_name, node, candidates))
+    num_nodes = len(node_candidates)
+
+    rnd = random.Random(seed)
+    best_state = None
+    num_passes = 0
+    while True:
+        state = _greedy_pass(defense_config, roster_set.get_all_roster_ids(), team_size, node_candidates, rnd)
+        num_passes += 1
+        if best_state is None or len(state.get_assignments()) > len(best_state.get_assignments()):
+            best_state = state
+        if len(best_state.get_assignments()) == num_nodes or time.perf_counter() - start_time >= time_limit:
+            break
+        # no point in restarting if some node can't be attacked at all
+        if not domains.is_feasible():
+            break
+
+    # fill out the teams with any other champs from the roster, in sorted slot order
+    teams = {}
+    complete = len(best_state.get_assignments()) == num_nodes
+    for roster_id in roster_set.get_all_roster_ids():
+        team = best_state.get_team(roster_id).copy()
+        for champ in domains.get_team_domain(roster_id):
+            if len(team) >= team_size:
+                break
+            if champ not in team:
+                team.append(champ)
+        complete = complete and len(team) == team_size
+        teams[roster_id] = sorted(team)
+
+    logging.info("greedy assigned {} of {} nodes in {} passes".format(len(best_state.get_assignments()), num_nodes,
+                                                                      num_passes))
+    if complete:
+        return AttackModel.AttackSolution(cp_model.FEASIBLE, 'FEASIBLE', time.perf_counter() - start_time, teams,
+                                          best_state.get_assignments())
+
+    return AttackModel.AttackSolution(cp_model.UNKNOWN, 'UNKNOWN', time.perf_counter() - start_time, teams,
+                                      best_state.get_assignments())
+
+
+def solve_with_greedy_hint(attack_model: AttackModel.AttackModel, time_limit: float = None, num_workers: int = None,
+                           fast_mode: bool = False, greedy_time_limit: float = 0.5) -> AttackModel.AttackSolution:
+    # runs the greedy planner and hints the model with its plan before solving. in fast mode a complete greedy plan is
+    #  returned without solving. a complete greedy plan is also returned if the solver runs out of time without one
+    greedy_solution = plan_greedy(attack_model.get_aw_config(), attack_model.get_defense_config(),
+                                  attack_model.get_roster_set(), attack_model.get_counter_config(), greedy_time_limit)
+    if fast_mode and greedy_solution.is_feasible():
+        return greedy_solution
+
+    AttackModel.add_solution_hint(attack_model, greedy_solution)
+    solution = AttackModel.solve_attack_model(attack_model, time_limit, num_workers)
+    if solution.get_status() == cp_model.UNKNOWN and greedy_solution.is_feasible():
+        logging.info("solver found no solution in time, using the greedy plan")
+        return greedy_solution
+
+    return solution
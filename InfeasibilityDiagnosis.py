@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import AWConfig
+import AttackModel
+import CompiledInputs
+import DefenseConfig
+import DefenderCounterConfig
+import RosterSet
+
+from ortools.sat import cp_model_pb2
+from ortools.sat.python import cp_model
+
+# constraint groups that can be switched off to explain an infeasible model. the section groups only define the
+#  section checks and the symmetry and objective groups never decide feasibility, so those always stay on
+_RELAXABLE_GROUPS = ['node', 'team', 'sequence', 'side']
+
+
+class InfeasibilityDiagnosis:
+    _status_name: str
+    _groups: list
+    _reasons: list
+    _minimal: bool
+
+    def __init__(self, status_name: str, groups: list = None, reasons: list = None, minimal: bool = True):
+        self._status_name = status_name
+        self._groups = groups if groups else []
+        self._reasons = reasons if reasons else []
+        self._minimal = minimal
+
+    def get_status_name(self) -> str:
+        return self._status_name
+
+    def is_infeasible(self) -> bool:
+        return self._status_name == 'INFEASIBLE'
+
+    def get_groups(self) -> list:
+        # constraint group keys that can't all hold together, eg ('node', 34), ('sequence', 3)
+        return self._groups.copy()
+
+    def get_reasons(self) -> list:
+        # one description per group, in the same order
+        return self._reasons.copy()
+
+    def is_minimal(self) -> bool:
+        # false if some solve timed out while shrinking the groups, so one of them might not be needed
+        return self._minimal
+
+
+def _describe_sections(inputs: CompiledInputs.CompiledInputs, section_names: tuple) -> str:
+    return ", ".join("{} (nodes {})".format(section_name, list(inputs.get_section_nodes(section_name)))
+                     for section_name in section_names)
+
+
+def _describe_group(attack_model: AttackModel.AttackModel, group_key: tuple) -> str:
+    inputs = attack_model.get_inputs()
+    domains = attack_model.get_domains()
+    if group_key[0] == 'node':
+        node = group_key[1]
+        section_name = inputs.get_node_section(node)
+        attackers = domains.get_attacker_domain(node)
+        if not attackers:
+            return "node {} in {} has no counter present in any roster (counters {})" \
+                .format(node, section_name, list(inputs.get_node_counters(node)))
+        return "node {} in {} (sequence {}, side {}) can only be attacked by rosters {} using counters {}" \
+            .format(node, section_name, inputs.get_sequence_num(section_name), inputs.get_side_num(section_name),
+                    domains.get_node_rosters(node), attackers)
+    if group_key[0] == 'team':
+        roster_id = group_key[1]
+        team_size = attack_model.get_aw_config().get_team_size()
+        team_domain = domains.get_team_domain(roster_id)
+        if len(team_domain) < team_size:
+            return "roster {} has only {} usable champs, a team needs {}".format(roster_id, len(team_domain),
+                                                                                team_size)
+        return "roster {} only has one team of {}, picked from {}".format(roster_id, team_size, team_domain)
+    if group_key[0] == 'sequence':
+        seq_num = group_key[1]
+        return "sequence {}: no team can attack more than one of {}".format(
+            seq_num, _describe_sections(inputs, inputs.get_sections_by_seq_num()[seq_num]))
+    if group_key[0] == 'side':
+        sections_by_side_num = inputs.get_sections_by_side_num()
+        return "sides {} and {}: no team can attack both {} and {}".format(
+            group_key[1], group_key[2], _describe_sections(inputs, sections_by_side_num[group_key[1]]),
+            _describe_sections(inputs, sections_by_side_num[group_key[2]]))
+
+    return "constraint group {}".format(group_key)
+
+
+def _solve_with_assumptions(model: cp_model.CpModel, literals: list, time_limit: float) -> tuple:
+    # returns (status, indices of the assumption literals that are enough to make the model infeasible)
+    model.ClearAssumptions()
+    model.AddAssumptions(literals)
+    solver = cp_model.CpSolver()
+    if time_limit:
+        solver.parameters.max_time_in_seconds = time_limit
+    # the assumptions behind an infeasible result are only tracked by a single worker
+    solver.parameters.num_workers = 1
+    status = solver.Solve(model)
+    if status != cp_model.INFEASIBLE:
+        return status, []
+
+    return status, solver.SufficientAssumptionsForInfeasibility()
+
+
+def diagnose_infeasibility(aw_config: AWConfig.AWConfig, defense_config: DefenseConfig.DefenseConfig,
+                           roster_set: RosterSet.RosterSet, counter_config: DefenderCounterConfig.DefenderCounterConfig,
+                           time_limit: float = 10.0, minimize: bool = True) -> InfeasibilityDiagnosis:
+    # builds an editable model (which keeps the domains in constraints rather than in the variables), puts every
+    #  relaxable constraint group behind its own assumption literal and asks the solver which assumptions it needed to
+    #  prove infeasibility. with minimize, each of those groups is then dropped in turn and kept out if the rest is
+    #  still infeasible, which leaves a subset where every group is needed. time_limit is per solve
+    attack_model = AttackModel.build_attack_model(aw_config, defense_config, roster_set, counter_config, editable=True)
+    model = attack_model.get_model()
+    literal_by_group = {}
+    group_by_index = {}
+    for group_key in attack_model.get_group_keys():
+        if group_key[0] not in _RELAXABLE_GROUPS:
+            continue
+        literal = model.NewBoolVar("enable {}".format(group_key))
+        for constraint in attack_model.get_group_constraints(group_key):
+            constraint.OnlyEnforceIf(literal)
+        literal_by_group[group_key] = literal
+        group_by_index[literal.Index()] = group_key
+
+    status, core_indices = _solve_with_assumptions(model, list(literal_by_group.values()), time_limit)
+    if status != cp_model.INFEASIBLE:
+        return InfeasibilityDiagnosis(cp_model_pb2.CpSolverStatus.Name(status))
+    core = list(group_by_index[index] for index in core_indices)
+    logging.info("solver needed {} of {} constraint groups".format(len(core), len(literal_by_group)))
+
+    minimal = True
+    if minimize:
+        ii = 0
+        while ii < len(core):
+            candidate = core[:ii] + core[ii + 1:]
+            status, core_indices = _solve_with_assumptions(model, list(literal_by_group[x] for x in candidate),
+                                                           time_limit)
+            if status == cp_model.INFEASIBLE:
+                # not needed, and the solver may have found an even smaller subset
+                needed = set(group_by_index[index] for index in core_indices)
+                core = list(x for x in candidate if x in needed)
+            else:
+                if status != cp_model.FEASIBLE and status != cp_model.OPTIMAL:
+                    minimal = False
+                ii += 1
+        logging.info("reduced to {} constraint groups".format(len(core)))
+
+    return InfeasibilityDiagnosis('INFEASIBLE', core, list(_describe_group(attack_model, x) for x in core), minimal)
+
+
+def print_diagnosis(diagnosis: InfeasibilityDiagnosis):
+    if not diagnosis.is_infeasible():
+        print("status: {}, nothing to diagnose".format(diagnosis.get_status_name()))
+        return
+    if not diagnosis.get_groups():
+        print("infeasible, but not because of any single roster, node, sequence or side")
+        return
+    not_minimal = "" if diagnosis.is_minimal() else " (may not be minimal)"
+    print("infeasible because of these {}{} together:".format(len(diagnosis.get_groups()), not_minimal))
+    for reason in diagnosis.get_reasons():
+        print("\t{}".format(reason))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)-8s %(funcName)s:%(message)s',
+                        level=logging.INFO,
+                        datefmt='%Y-%m-%d %H:%M:%S')
+
+    parser = argparse.ArgumentParser(description="explain why a plan is infeasible")
+    parser.add_argument('--defense', default='dc-2.json', help="defense config json file")
+    parser.add_argument('--rosters', default='rosterset-1.json', help="roster set json file")
+    parser.add_argument('--counters', default='defendercounter-1.json', help="defender counters json file")
+    parser.add_argument('--num-champions', type=int, default=250)
+    parser.add_argument('--time-limit', type=float, default=10.0, help="time limit per solve, in seconds")
+    parser.add_argument('--no-minimize', action='store_true', help="report the first subset the solver finds")
+    args = parser.parse_args()
+
+    print_diagnosis(diagnose_infeasibility(AWConfig.AWConfig(args.num_champions),
+                                           DefenseConfig.load_defense_config_from_file(args.defense),
+                                           RosterSet.load_roster_set_from_file(args.rosters),
+                                           DefenderCounterConfig.load_counters_from_file(args.counters),
+                                           args.time_limit, not args.no_minimize))
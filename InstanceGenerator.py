@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import logging
+import os
+import random
+import AWConfig
+import DefenseConfig
+import DefenderCounterConfig
+import RosterSet
+
+
+class InstanceSpec:
+    _num_champions: int
+    _num_rosters: int
+    _roster_size: int
+    _team_size: int
+    _num_nodes: int
+    _counters_per_node: int
+    _max_section_size: int
+    _sections_per_seq: int
+    _num_side_nums: int
+    _num_side_sections: int
+    _feasible: bool
+    _seed: int
+
+    def __init__(self, num_champions: int = 250, num_rosters: int = 10, roster_size: int = 20, team_size: int = 3,
+                 num_nodes: int = 50, counters_per_node: int = 5, max_section_size: int = 4, sections_per_seq: int = 3,
+                 num_side_nums: int = 2, num_side_sections: int = 4, feasible: bool = True, seed: int = 0):
+        self._num_champions = num_champions
+        self._num_rosters = num_rosters
+        self._roster_size = roster_size
+        self._team_size = team_size
+        self._num_nodes = num_nodes
+        self._counters_per_node = counters_per_node
+        self._max_section_size = max_section_size
+        self._sections_per_seq = sections_per_seq
+        self._num_side_nums = num_side_nums
+        self._num_side_sections = num_side_sections
+        self._feasible = feasible
+        self._seed = seed
+
+    def get_num_champions(self) -> int:
+        return self._num_champions
+
+    def get_num_rosters(self) -> int:
+        return self._num_rosters
+
+    def get_roster_size(self) -> int:
+        return self._roster_size
+
+    def get_team_size(self) -> int:
+        return self._team_size
+
+    def get_num_nodes(self) -> int:
+        return self._num_nodes
+
+    def get_counters_per_node(self) -> int:
+        return self._counters_per_node
+
+    def get_max_section_size(self) -> int:
+        return self._max_section_size
+
+    def get_sections_per_seq(self) -> int:
+        return self._sections_per_seq
+
+    def get_num_side_nums(self) -> int:
+        return self._num_side_nums
+
+    def get_num_side_sections(self) -> int:
+        # how many sections get a side number, the rest have none
+        return self._num_side_sections
+
+    def is_feasible(self) -> bool:
+        return self._feasible
+
+    def get_seed(self) -> int:
+        return self._seed
+
+    def get_name(self) -> str:
+        return "r{}-n{}-{}-s{}".format(self._num_rosters, self._num_nodes,
+                                       'feasible' if self._feasible else 'infeasible', self._seed)
+
+
+def _can_use_roster(sections: list, section_idx: int, sections_by_roster: dict, roster_id: int) -> bool:
+    # same rules as the attack model: no two sections with the same sequence number, or different side numbers
+    seq_num, side_num = sections[section_idx][1], sections[section_idx][2]
+    for other_idx in sections_by_roster[roster_id]:
+        if sections[other_idx][1] == seq_num:
+            return False
+        other_side_num = sections[other_idx][2]
+        if DefenseConfig.is_valid_side_num(side_num) and DefenseConfig.is_valid_side_num(other_side_num) and \
+                side_num != other_side_num:
+            return False
+
+    return True
+
+
+def generate_instance(spec: InstanceSpec) -> tuple:
+    # returns (aw config, defense config, roster set, counter config).
+    #  feasible instances are built around a planted solution: every section is given one team that is allowed there,
+    #  and every node gets that team's attacker among its counters.
+    #  infeasible instances plant the same solution, then make two sections with the same sequence number depend on
+    #  champs that only roster 0 has, which no amount of domain pruning detects
+    rnd = random.Random(spec.get_seed())
+    champs = list(range(1, spec.get_num_champions() + 1))
+    # champs only roster 0 may hold, for the infeasible case
+    exclusive_champs = [] if spec.is_feasible() else champs[-spec.get_counters_per_node():]
+    shared_champs = champs[:len(champs) - len(exclusive_champs)]
+    if spec.get_roster_size() > len(shared_champs) or spec.get_team_size() > spec.get_roster_size():
+        raise ValueError("roster size must be between team size and the number of champions")
+
+    rosters = list(sorted(rnd.sample(shared_champs, spec.get_roster_size())) for _ in range(spec.get_num_rosters()))
+    rosters[0] = sorted(set(rosters[0]) | set(exclusive_champs))
+    planted_teams = list(rnd.sample(list(x for x in roster if x not in exclusive_champs), spec.get_team_size())
+                         for roster in rosters)
+
+    # split nodes into sections of 1..max_section_size, group them into sequence numbers and give the first few sections
+    #  side numbers. each section is a list of (nodes, sequence num, side num)
+    sections = []
+    node = 1
+    while node <= spec.get_num_nodes():
+        section_size = min(rnd.randint(1, spec.get_max_section_size()), spec.get_num_nodes() - node + 1)
+        section_idx = len(sections)
+        side_num = -1
+        # no side numbers at all when num_side_nums is 0
+        if section_idx < spec.get_num_side_sections() and spec.get_num_side_nums() > 0:
+            side_num = section_idx % spec.get_num_side_nums()
+        sections.append((list(range(node, node + section_size)), section_idx // spec.get_sections_per_seq(),
+                         side_num))
+        node += section_size
+    if not spec.is_feasible() and (len(sections) < 2 or sections[0][1] != sections[1][1]):
+        raise ValueError("infeasible instances need at least 2 sections per sequence number")
+
+    # plant a team per section
+    sections_by_roster = {roster_id: [] for roster_id in range(spec.get_num_rosters())}
+    section_rosters = []
+    for section_idx in range(len(sections)):
+        usable = list(roster_id for roster_id in range(spec.get_num_rosters())
+                      if _can_use_roster(sections, section_idx, sections_by_roster, roster_id))
+        if not spec.is_feasible() and section_idx < 2:
+            # the two sections that will both need roster 0 get different, valid teams in the planted solution
+            usable = list(roster_id for roster_id in usable if roster_id != 0)
+        if not usable:
+            raise ValueError("not enough rosters for {} sections per sequence number"
+                             .format(spec.get_sections_per_seq()))
+        roster_id = rnd.choice(usable)
+        sections_by_roster[roster_id].append(section_idx)
+        section_rosters.append(roster_id)
+
+    counter_config = DefenderCounterConfig.DefenderCounterConfig()
+    for section_idx, (nodes, _, _) in enumerate(sections):
+        for node in nodes:
+            if not spec.is_feasible() and section_idx < 2 and node == nodes[0]:
+                counters = rnd.sample(exclusive_champs, len(exclusive_champs))
+            else:
+                attacker = rnd.choice(planted_teams[section_rosters[section_idx]])
+                others = rnd.sample(list(x for x in shared_champs if x != attacker), spec.get_counters_per_node() - 1)
+                counters = [attacker] + others
+                rnd.shuffle(counters)
+            counter_config.add_counters(node, counters)
+
+    defense_config = DefenseConfig.DefenseConfig()
+    for section_idx, (nodes, seq_num, side_num) in enumerate(sections):
+        defense_config.add_section("section{}".format(section_idx), DefenseConfig.SectionConfig(nodes, seq_num,
+                                                                                                side_num))
+    aw_config = AWConfig.AWConfig(spec.get_num_champions(), spec.get_num_rosters(), spec.get_team_size())
+
+    return aw_config, defense_config, RosterSet.RosterSet(rosters), counter_config
+
+
+def write_instance(dirname: str, defense_config: DefenseConfig.DefenseConfig, roster_set: RosterSet.RosterSet,
+                   counter_config: DefenderCounterConfig.DefenderCounterConfig) -> tuple:
+    # writes the instance in the same formats the load_*_from_file functions read. returns the three filenames
+    os.makedirs(dirname, exist_ok=True)
+    defense_file = os.path.join(dirname, 'dc.json')
+    roster_file = os.path.join(dirname, 'rosterset.json')
+    counters_file = os.path.join(dirname, 'defendercounter.json')
+
+    with open(defense_file, 'w') as f:
+        json.dump(DefenseConfig.defense_config_to_json_data(defense_config), f, indent=2)
+    with open(roster_file, 'w') as f:
+        json.dump(RosterSet.roster_set_to_json_data(roster_set), f)
+    with open(counters_file, 'w') as f:
+        json.dump(DefenderCounterConfig.counters_to_json_data(counter_config), f, indent=2)
+
+    return defense_file, roster_file, counters_file
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)-8s %(funcName)s:%(message)s',
+                        level=logging.INFO,
+                        datefmt='%Y-%m-%d %H:%M:%S')
+
+    parser = argparse.ArgumentParser(description="generate a synthetic attack planning instance")
+    parser.add_argument('output_dir')
+    parser.add_argument('--num-champions', type=int, default=250)
+    parser.add_argument('--num-rosters', type=int, default=10)
+    parser.add_argument('--roster-size', type=int, default=20)
+    parser.add_argument('--team-size', type=int, default=3)
+    parser.add_argument('--num-nodes', type=int, default=50)
+    parser.add_argument('--counters-per-node', type=int, default=5)
+    parser.add_argument('--max-section-size', type=int, default=4)
+    parser.add_argument('--sections-per-seq', type=int, default=3)
+    parser.add_argument('--num-side-nums', type=int, default=2)
+    parser.add_argument('--num-side-sections', type=int, default=4)
+    parser.add_argument('--infeasible', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    instance_spec = InstanceSpec(args.num_champions, args.num_rosters, args.roster_size, args.team_size,
+                                 args.num_nodes, args.counters_per_node, args.max_section_size,
+                                 args.sections_per_seq, args.num_side_nums, args.num_side_sections,
+                                 not args.infeasible, args.seed)
+    _, dc, rs, dcc = generate_instance(instance_spec)
+    for fname in write_instance(args.output_dir, dc, rs, dcc):
+        print("wrote {}".format(fname))
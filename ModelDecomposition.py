@@ -0,0 +1,140 @@
+import concurrent.futures
+import logging
+import os
+import time
+import AWConfig
+import AttackModel
+import DefenseConfig
+import DefenderCounterConfig
+import ModelDomains
+import RosterSet
+
+from ortools.sat import cp_model_pb2
+from ortools.sat.python import cp_model
+
+'''
+Sections only interact through the teams they can use: team composition is shared by every node a team attacks, and
+the sequence/side number constraints only forbid the same team in two sections. So if sections and rosters are linked
+whenever the roster holds a counter for a node in the section, each connected component of that graph can be solved
+on its own and the results merged.
+'''
+
+
+class Component:
+    _section_names: list
+    _roster_ids: list
+
+    def __init__(self, section_names: list, roster_ids: list):
+        self._section_names = section_names
+        self._roster_ids = roster_ids
+
+    def get_section_names(self) -> list:
+        return self._section_names.copy()
+
+    def get_roster_ids(self) -> list:
+        return self._roster_ids.copy()
+
+
+def find_components(defense_config: DefenseConfig.DefenseConfig, roster_set: RosterSet.RosterSet,
+                    domains: ModelDomains.ModelDomains) -> list:
+    # union-find over sections and rosters. rosters that can't attack any node aren't in any component
+    parents: dict = {}
+
+    def find(x):
+        while parents[x] != x:
+            parents[x] = parents[parents[x]]
+            x = parents[x]
+        return x
+
+    section_names = defense_config.get_all_sections()
+    for section_name in section_names:
+        parents[('section', section_name)] = ('section', section_name)
+    for roster_id in roster_set.get_all_roster_ids():
+        parents[('roster', roster_id)] = ('roster', roster_id)
+    for section_name in section_names:
+        for roster_id in domains.get_section_rosters(section_name):
+            parents[find(('roster', roster_id))] = find(('section', section_name))
+
+    members_by_root: dict = {}
+    for section_name in section_names:
+        root = find(('section', section_name))
+        if root not in members_by_root:
+            members_by_root[root] = ([], [])
+        members_by_root[root][0].append(section_name)
+    for roster_id in roster_set.get_all_roster_ids():
+        root = find(('roster', roster_id))
+        if root in members_by_root:
+            members_by_root[root][1].append(roster_id)
+
+    return list(Component(section_names, roster_ids) for section_names, roster_ids in members_by_root.values())
+
+
+def _solve_component(aw_config: AWConfig.AWConfig, defense_config: DefenseConfig.DefenseConfig,
+                     roster_set: RosterSet.RosterSet, counter_config: DefenderCounterConfig.DefenderCounterConfig,
+                     component: Component, time_limit: float, num_workers: int,
+                     break_symmetry: bool) -> AttackModel.AttackSolution:
+    # the sub model keeps the full roster set so roster ids stay the same, but only the component's rosters can be
+    #  assigned to any of its nodes
+    sub_defense_config = DefenseConfig.DefenseConfig({section_name: defense_config.get_section(section_name)
+                                                      for section_name in component.get_section_names()})
+    attack_model = AttackModel.build_attack_model(aw_config, sub_defense_config, roster_set, counter_config,
+                                                  break_symmetry)
+    return AttackModel.solve_attack_model(attack_model, time_limit, num_workers)
+
+
+def _merge_status(statuses: list) -> int:
+    if cp_model.MODEL_INVALID in statuses:
+        return cp_model.MODEL_INVALID
+    if cp_model.INFEASIBLE in statuses:
+        return cp_model.INFEASIBLE
+    if cp_model.UNKNOWN in statuses:
+        return cp_model.UNKNOWN
+    if cp_model.FEASIBLE in statuses:
+        return cp_model.FEASIBLE
+    return cp_model.OPTIMAL
+
+
+def solve_decomposed(aw_config: AWConfig.AWConfig, defense_config: DefenseConfig.DefenseConfig,
+                     roster_set: RosterSet.RosterSet, counter_config: DefenderCounterConfig.DefenderCounterConfig,
+                     time_limit: float = None, num_workers: int = None, max_parallel: int = None,
+                     break_symmetry: bool = False) -> AttackModel.AttackSolution:
+    # solves each independent component separately, in parallel, and merges the results. the time limit applies to
+    #  each component, and num_workers is split between the components solved at once
+    start_time = time.perf_counter()
+    domains = ModelDomains.compute_model_domains(aw_config, defense_config, roster_set, counter_config)
+    components = find_components(defense_config, roster_set, domains)
+    logging.info("{} independent components, sizes (sections, rosters): {}"
+                 .format(len(components), list((len(x.get_section_names()), len(x.get_roster_ids()))
+                                               for x in components)))
+    if len(components) <= 1:
+        attack_model = AttackModel.build_attack_model(aw_config, defense_config, roster_set, counter_config,
+                                                      break_symmetry)
+        return AttackModel.solve_attack_model(attack_model, time_limit, num_workers)
+
+    # largest components first so they aren't left to run alone at the end
+    components.sort(key=lambda x: len(x.get_section_names()), reverse=True)
+    if max_parallel is None:
+        max_parallel = min(len(components), os.cpu_count() or 1)
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    component_workers = max(1, num_workers // max_parallel)
+    # cp-sat releases the gil while solving, so threads are enough to solve components in parallel
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_parallel) as pool:
+        solutions = list(pool.map(lambda x: _solve_component(aw_config, defense_config, roster_set, counter_config,
+                                                             x, time_limit, component_workers, break_symmetry),
+                                  components))
+
+    status = _merge_status(list(solution.get_status() for solution in solutions))
+    teams = {}
+    assignments = {}
+    if status == cp_model.FEASIBLE or status == cp_model.OPTIMAL:
+        # each component's teams are the ones it uses. rosters no component uses can take any valid team, so take
+        #  them from the first component's solution
+        teams = solutions[0].get_all_teams()
+        for component, solution in zip(components, solutions):
+            for roster_id in component.get_roster_ids():
+                teams[roster_id] = solution.get_team(roster_id)
+            assignments.update(solution.get_all_assignments())
+
+    return AttackModel.AttackSolution(status, cp_model_pb2.CpSolverStatus.Name(status),
+                                      time.perf_counter() - start_time, teams, assignments)
@@ -0,0 +1,93 @@
+import logging
+import AWConfig
+import CompiledInputs
+import DefenseConfig
+import DefenderCounterConfig
+import RosterSet
+
+
+class ModelDomains:
+    _team_domains: dict[int, list]
+    _attacker_domains: dict[int, list]
+    _node_rosters: dict[int, list]
+    _section_rosters: dict[str, list]
+    _infeasible_nodes: list
+    _infeasible_rosters: list
+
+    def __init__(self):
+        self._team_domains = {}
+        self._attacker_domains = {}
+        self._node_rosters = {}
+        self._section_rosters = {}
+        self._infeasible_nodes = []
+        self._infeasible_rosters = []
+
+    def get_team_domain(self, roster_id: int) -> list:
+        # champions that can fill a team slot for this roster
+        return self._team_domains[roster_id].copy()
+
+    def get_attacker_domain(self, node_id: int) -> list:
+        # counters for this node that at least one roster holds
+        return self._attacker_domains[node_id].copy()
+
+    def get_node_rosters(self, node_id: int) -> list:
+        # rosters that hold at least one counter for this node
+        return self._node_rosters[node_id].copy()
+
+    def is_node_roster_usable(self, node_id: int, roster_id: int) -> bool:
+        return roster_id in self._node_rosters[node_id]
+
+    def get_section_rosters(self, section_name: str) -> list:
+        # rosters that can attack at least one node in this section
+        return self._section_rosters[section_name].copy()
+
+    def is_section_roster_usable(self, section_name: str, roster_id: int) -> bool:
+        return roster_id in self._section_rosters[section_name]
+
+    def get_infeasible_nodes(self) -> list:
+        return self._infeasible_nodes.copy()
+
+    def get_infeasible_rosters(self) -> list:
+        return self._infeasible_rosters.copy()
+
+    def is_feasible(self) -> bool:
+        return not self._infeasible_nodes and not self._infeasible_rosters
+
+
+def compute_model_domains(aw_config: AWConfig.AWConfig, defense_config: DefenseConfig.DefenseConfig,
+                          roster_set: RosterSet.RosterSet, counter_config: DefenderCounterConfig.DefenderCounterConfig,
+                          inputs: CompiledInputs.CompiledInputs = None) -> ModelDomains:
+    # inputs can be passed in if they were already compiled from the same configs
+    if inputs is None:
+        inputs = CompiledInputs.compile_inputs(aw_config, defense_config, roster_set, counter_config)
+    domains = ModelDomains()
+    team_size = aw_config.get_team_size()
+
+    # a team can only hold (valid) champs from its roster
+    for roster_id in inputs.get_roster_ids():
+        domains._team_domains[roster_id] = list(inputs.get_roster_champs(roster_id))
+        if len(domains._team_domains[roster_id]) < team_size:
+            logging.warning("roster {} has {} usable champs, needs at least {}"
+                            .format(roster_id, len(domains._team_domains[roster_id]), team_size))
+            domains._infeasible_rosters.append(roster_id)
+
+    # a node can only be attacked by a roster holding one of its counters, and only with counters some roster holds
+    for section_name in inputs.get_section_names():
+        section_rosters = 0
+        for node in inputs.get_section_nodes(section_name):
+            node_roster_bits = 0
+            attackers = set()
+            for champ in inputs.get_node_counters(node):
+                champ_rosters = inputs.get_champ_rosters(champ)
+                if champ_rosters:
+                    node_roster_bits |= champ_rosters
+                    attackers.add(champ)
+            domains._node_rosters[node] = CompiledInputs.bits_to_list(node_roster_bits)
+            domains._attacker_domains[node] = sorted(attackers)
+            section_rosters |= node_roster_bits
+            if not node_roster_bits:
+                logging.warning("section {} node {} has no counter present in any roster".format(section_name, node))
+                domains._infeasible_nodes.append(node)
+        domains._section_rosters[section_name] = CompiledInputs.bits_to_list(section_rosters)
+
+    return domains
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+import argparse
+import contextlib
+import json
+import logging
+import re
+import time
+
+from ortools.sat.python import cp_model
+
+try:
+    import resource
+except ImportError:
+    # not available on windows, peak memory is just not reported there
+    resource = None
+
+
+def _is_table(constraint) -> bool:
+    # newer ortools wraps the proto with has_x() accessors instead of HasField(). reading constraint.table directly
+    #  would turn the constraint into a table constraint
+    if hasattr(constraint, 'has_table'):
+        return constraint.has_table()
+    return constraint.HasField('table')
+
+
+def model_size(model: cp_model.CpModel) -> dict:
+    proto = model.Proto()
+    num_table_tuples = 0
+    for constraint in proto.constraints:
+        if _is_table(constraint):
+            table = constraint.table
+            arity = len(table.exprs) if len(table.exprs) else len(table.vars)
+            num_table_tuples += len(table.values) // max(1, arity)
+
+    return {'num_variables': len(proto.variables), 'num_constraints': len(proto.constraints),
+            'num_table_tuples': num_table_tuples}
+
+
+def peak_memory_kb() -> int:
+    # peak resident set size of this process so far (including cp-sat's native allocations), None if unknown
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class ModelProfiler:
+    # collects one record per phase (load, build step, solve). every record is also passed to on_phase as soon as the
+    #  phase ends, if given
+    _phases: list
+    _solve_stats: dict
+    _on_phase: callable
+
+    def __init__(self, on_phase: callable = None):
+        self._phases = []
+        self._solve_stats = {}
+        self._on_phase = on_phase
+
+    @contextlib.contextmanager
+    def phase(self, name: str, model: cp_model.CpModel = None):
+        # times the enclosed block. if a model is given, also records its size after the block and how much the block
+        #  added to it
+        size_before = model_size(model) if model is not None else None
+        start_time = time.perf_counter()
+        yield
+        record = {'phase': name, 'time': time.perf_counter() - start_time}
+        if model is not None:
+            size_after = model_size(model)
+            for key in size_after:
+                record[key] = size_after[key]
+                record['added_' + key] = size_after[key] - size_before[key]
+        record['peak_memory_kb'] = peak_memory_kb()
+        self._phases.append(record)
+        if self._on_phase is not None:
+            self._on_phase(record)
+
+    def record_solve_stats(self, solver: cp_model.CpSolver, status: int):
+        response = solver.ResponseProto()
+        self._solve_stats = {
+            'status': solver.StatusName(status),
+            'wall_time': solver.WallTime(),
+            'user_time': solver.UserTime(),
+            'deterministic_time': response.deterministic_time,
+            'num_branches': solver.NumBranches(),
+            'num_conflicts': solver.NumConflicts(),
+            'num_booleans': response.num_booleans,
+            'num_restarts': response.num_restarts,
+            'presolve_time': None
+        }
+        # only in the log, which is only there if the solver was set up by prepare_solver()
+        presolve_end = re.search(r'Starting search at ([0-9.eE+-]+)s', response.solve_log)
+        if presolve_end:
+            self._solve_stats['presolve_time'] = float(presolve_end.group(1))
+
+    def get_phases(self) -> list:
+        return list(record.copy() for record in self._phases)
+
+    def get_solve_stats(self) -> dict:
+        return self._solve_stats.copy()
+
+    def get_report(self) -> dict:
+        return {'phases': self.get_phases(), 'solve': self.get_solve_stats(), 'peak_memory_kb': peak_memory_kb()}
+
+
+def phase(profiler: ModelProfiler, name: str, model: cp_model.CpModel = None):
+    # profiler.phase() if there is a profiler, otherwise a no-op, so callers don't need two code paths
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.phase(name, model)
+
+
+def prepare_solver(solver: cp_model.CpSolver):
+    # the solve log is the only place the presolve time shows up, so send it to the response instead of stdout
+    solver.parameters.log_search_progress = True
+    solver.parameters.log_to_stdout = False
+    solver.parameters.log_to_response = True
+
+
+if __name__ == '__main__':
+    # imported here since AttackModel imports this module
+    import AWConfig
+    import AttackModel
+    import DefenseConfig
+    import DefenderCounterConfig
+    import RosterSet
+
+    logging.basicConfig(format='%(asctime)s %(levelname)-8s %(funcName)s:%(message)s',
+                        level=logging.INFO,
+                        datefmt='%Y-%m-%d %H:%M:%S')
+
+    parser = argparse.ArgumentParser(description="profile loading, building and solving one plan")
+    parser.add_argument('--defense', default='dc-2.json', help="defense config json file")
+    parser.add_argument('--rosters', default='rosterset-1.json', help="roster set json file")
+    parser.add_argument('--counters', default='defendercounter-1.json', help="defender counters json file")
+    parser.add_argument('--num-champions', type=int, default=250)
+    parser.add_argument('--time-limit', type=float, help="solve time limit, in seconds")
+    parser.add_argument('--break-symmetry', action='store_true')
+    parser.add_argument('--output', help="json file for the report, printed if not given")
+    args = parser.parse_args()
+
+    profiler = ModelProfiler()
+    with profiler.phase('load_defense_config'):
+        defense_config = DefenseConfig.load_defense_config_from_file(args.defense)
+    with profiler.phase('load_roster_set'):
+        roster_set = RosterSet.load_roster_set_from_file(args.rosters)
+    with profiler.phase('load_counters'):
+        counter_config = DefenderCounterConfig.load_counters_from_file(args.counters)
+    attack_model = AttackModel.build_attack_model(AWConfig.AWConfig(args.num_champions), defense_config, roster_set,
+                                                  counter_config, args.break_symmetry, profiler)
+    AttackModel.solve_attack_model(attack_model, args.time_limit, profiler=profiler)
+
+    report = json.dumps(profiler.get_report(), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+    else:
+        print(report)
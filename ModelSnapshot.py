@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import logging
+import os
+import struct
+import tempfile
+import time
+import zlib
+import AWConfig
+import AttackModel
+import CompiledInputs
+import DefenseConfig
+import DefenderCounterConfig
+import ModelDomains
+import RosterSet
+
+from ortools.sat.python import cp_model
+
+# a snapshot file is the magic, a 4 byte big-endian header length, a json header with the configs and the variable and
+#  constraint indices behind the attack model, then the zlib compressed cp-sat model proto
+_MAGIC = b'AWSNAP1\n'
+_HEADER_LENGTH = struct.Struct('>I')
+
+
+def _proto_to_bytes(proto) -> tuple:
+    # returns (format, data). protobuf messages serialize to binary, but the c++ backed proto of newer ortools versions
+    #  can only be written out as text
+    if hasattr(proto, 'SerializeToString'):
+        return 'binary', proto.SerializeToString()
+
+    return 'text', str(proto).encode()
+
+
+def _proto_from_bytes(proto, proto_format: str, data: bytes):
+    if proto_format == 'binary' and hasattr(proto, 'ParseFromString'):
+        proto.ParseFromString(data)
+    elif proto_format == 'text' and hasattr(proto, 'parse_text_format'):
+        if not proto.parse_text_format(data.decode()):
+            logging.error("could not parse the model in the snapshot")
+            raise ValueError("Invalid snapshot")
+    elif proto_format == 'text':
+        # imported here since only older ortools versions need it
+        from google.protobuf import text_format
+        text_format.Parse(data.decode(), proto)
+    else:
+        logging.error("this ortools version can't read a {} model, save the snapshot again".format(proto_format))
+        raise ValueError("Unsupported snapshot format")
+
+
+def _var_loader(model: cp_model.CpModel) -> callable:
+    # newer ortools wrap a variable straight from the proto, skipping the bounds check GetIntVarFromProtoIndex() does on
+    #  every call, which is most of the cost of wrapping the variables of a big model. variable 0 always exists, it's
+    #  the first team slot
+    proto = model.Proto()
+    try:
+        cp_model.IntVar(proto, 0)
+    except TypeError:
+        return model.GetIntVarFromProtoIndex
+
+    return lambda index: cp_model.IntVar(proto, index)
+
+
+def _index_to_json_data(attack_model: AttackModel.AttackModel) -> dict:
+    # proto indices of every variable and grouped constraint the model getters hand out, in the order they were
+    #  created, so a loaded model iterates its sections, nodes and rosters the same way the built one did
+    defender_assignments = attack_model.get_defender_assignments()
+    defender_team_ass_checks = attack_model.get_defender_team_ass_checks()
+    section_roster_ass_checks = attack_model.get_section_roster_ass_checks()
+    att_roster_ass_checks = attack_model.get_att_roster_ass_checks()
+    nodes = []
+    sections = []
+    for section_name in attack_model.get_section_names():
+        for node in defender_team_ass_checks[section_name]:
+            node_dtacs = defender_team_ass_checks[section_name][node]
+            node_aracs = att_roster_ass_checks[section_name][node]
+            nodes.append({'section': section_name, 'node_id': node,
+                          'team': defender_assignments[node]['team'].Index(),
+                          'attacker': defender_assignments[node]['attacker'].Index(),
+                          'team_checks': list([roster_id, node_dtacs[roster_id].Index()] for roster_id in node_dtacs),
+                          'attacker_checks': list([roster_id, list(node_aracs[roster_id][slot].Index()
+                                                                   for slot in node_aracs[roster_id])]
+                                                  for roster_id in node_aracs)})
+        section_sracs = section_roster_ass_checks[section_name]
+        sections.append({'section': section_name,
+                         'team_checks': list([roster_id, section_sracs[roster_id].Index()]
+                                             for roster_id in section_sracs)})
+    retired_literal = attack_model.get_retired_literal()
+
+    return {
+        'teams': list(list(slot.Index() for slot in team) for team in attack_model.get_teams()),
+        'nodes': nodes,
+        'sections': sections,
+        'groups': list({'key': list(group_key),
+                        'constraints': list(constraint.Index()
+                                            for constraint in attack_model.get_group_constraints(group_key))}
+                       for group_key in attack_model.get_group_keys()),
+        'retired_literal': retired_literal.Index() if retired_literal is not None else None,
+        'num_retired': attack_model.get_num_retired()
+    }
+
+
+def _index_from_json_data(attack_model: AttackModel.AttackModel, json_data: dict):
+    # fills the model getters with wrappers around the variables and constraints already in the loaded proto
+    model = attack_model.get_model()
+    load_var = _var_loader(model)
+    for team_indices in json_data['teams']:
+        attack_model.get_teams().append(list(load_var(x) for x in team_indices))
+    defender_assignments = attack_model.get_defender_assignments()
+    defender_team_ass_checks = attack_model.get_defender_team_ass_checks()
+    section_roster_ass_checks = attack_model.get_section_roster_ass_checks()
+    att_roster_ass_checks = attack_model.get_att_roster_ass_checks()
+    for section_name in attack_model.get_section_names():
+        defender_team_ass_checks[section_name] = {}
+        att_roster_ass_checks[section_name] = {}
+    for node_entry in json_data['nodes']:
+        section_name = node_entry['section']
+        node = int(node_entry['node_id'])
+        defender_assignments[node] = {'attacker': load_var(node_entry['attacker']),
+                                      'team': load_var(node_entry['team'])}
+        defender_team_ass_checks[section_name][node] = {roster_id: load_var(index)
+                                                        for roster_id, index in node_entry['team_checks']}
+        att_roster_ass_checks[section_name][node] = {roster_id: {slot: load_var(index)
+                                                                 for slot, index in enumerate(slot_indices)}
+                                                     for roster_id, slot_indices in node_entry['attacker_checks']}
+    for section_entry in json_data['sections']:
+        section_roster_ass_checks[section_entry['section']] = {roster_id: load_var(index)
+                                                               for roster_id, index in section_entry['team_checks']}
+    for group_entry in json_data['groups']:
+        for index in group_entry['constraints']:
+            attack_model.add_to_group(tuple(group_entry['key']), cp_model.Constraint(model, index))
+    if json_data['retired_literal'] is not None:
+        attack_model.set_retired_literal(load_var(json_data['retired_literal']), json_data['num_retired'])
+
+
+def save_snapshot(attack_model: AttackModel.AttackModel, filename: str):
+    # the configs go in too, so a snapshot is all a batch worker needs. the configs must be the ones the model is up to
+    #  date with, ie call update_attack_model() after editing them
+    aw_config = attack_model.get_aw_config()
+    proto_format, proto_data = _proto_to_bytes(attack_model.get_model().Proto())
+    header = {
+        'proto_format': proto_format,
+        'editable': attack_model.is_editable(),
+        'break_symmetry': attack_model.is_breaking_symmetry(),
+        'aw_config': {'num_champions': aw_config.get_num_champions(), 'num_rosters': aw_config.get_num_rosters(),
+                      'team_size': aw_config.get_team_size()},
+        'defense_config': DefenseConfig.defense_config_to_json_data(attack_model.get_defense_config()),
+        'roster_set': RosterSet.roster_set_to_json_data(attack_model.get_roster_set()),
+        'counter_config': DefenderCounterConfig.counters_to_json_data(attack_model.get_counter_config()),
+        'index': _index_to_json_data(attack_model)
+    }
+    header_data = json.dumps(header, separators=(',', ':')).encode()
+    # write to a temp file first so workers never load a partial snapshot
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(_MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header_data)))
+        f.write(header_data)
+        f.write(zlib.compress(proto_data))
+    os.replace(tmp_path, filename)
+
+
+def _read_snapshot(filename: str, with_proto: bool = True) -> tuple:
+    # returns (header, proto data). the proto data is None without with_proto
+    with open(filename, 'rb') as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            logging.error("{} is not a model snapshot".format(filename))
+            raise ValueError("Invalid snapshot")
+        header_length = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))[0]
+        header = json.loads(f.read(header_length))
+        proto_data = zlib.decompress(f.read()) if with_proto else None
+
+    return header, proto_data
+
+
+def _configs_from_header(header: dict) -> tuple:
+    return (AWConfig.AWConfig(header['aw_config']['num_champions'], header['aw_config']['num_rosters'],
+                              header['aw_config']['team_size']),
+            DefenseConfig.defense_config_from_json_data(header['defense_config']),
+            RosterSet.roster_set_from_json_data(header['roster_set']),
+            DefenderCounterConfig.counters_from_json_data(header['counter_config']))
+
+
+def _copy_proto(proto, other_proto):
+    if hasattr(proto, 'copy_from'):
+        proto.copy_from(other_proto)
+    else:
+        proto.CopyFrom(other_proto)
+
+
+class LoadedSnapshot:
+    # a snapshot file parsed once. models made from it with model_from_snapshot() copy the parsed cp-sat model,
+    #  which is much faster than parsing it again, so callers that need many models (eg a batch worker) keep one of
+    #  these around. the inputs and domains are read-only and shared by those models
+    _header: dict
+    _model: cp_model.CpModel
+    _inputs: CompiledInputs.CompiledInputs
+    _domains: ModelDomains.ModelDomains
+
+    def __init__(self, header: dict, model: cp_model.CpModel):
+        self._header = header
+        self._model = model
+        aw_config, defense_config, roster_set, counter_config = _configs_from_header(header)
+        self._inputs = CompiledInputs.compile_inputs(aw_config, defense_config, roster_set, counter_config)
+        self._domains = ModelDomains.compute_model_domains(aw_config, defense_config, roster_set, counter_config,
+                                                           self._inputs)
+
+    def get_header(self) -> dict:
+        return self._header
+
+    def get_model(self) -> cp_model.CpModel:
+        # the parsed model. copy it rather than changing it
+        return self._model
+
+    def get_inputs(self) -> CompiledInputs.CompiledInputs:
+        return self._inputs
+
+    def get_domains(self) -> ModelDomains.ModelDomains:
+        return self._domains
+
+    def get_configs(self) -> tuple:
+        # fresh (aw config, defense config, roster set, counter config) the snapshot was taken with
+        return _configs_from_header(self._header)
+
+    def is_editable(self) -> bool:
+        return self._header['editable']
+
+
+def read_snapshot(filename: str) -> LoadedSnapshot:
+    header, proto_data = _read_snapshot(filename)
+    model = cp_model.CpModel()
+    _proto_from_bytes(model.Proto(), header['proto_format'], proto_data)
+
+    return LoadedSnapshot(header, model)
+
+
+def load_snapshot_configs(filename: str) -> tuple:
+    # (aw config, defense config, roster set, counter config) the snapshot was taken with, without loading the model
+    header, _ = _read_snapshot(filename, with_proto=False)
+    return _configs_from_header(header)
+
+
+def model_from_snapshot(snapshot: LoadedSnapshot, defense_config: DefenseConfig.DefenseConfig = None,
+                        roster_set: RosterSet.RosterSet = None,
+                        counter_config: DefenderCounterConfig.DefenderCounterConfig = None) -> AttackModel.AttackModel:
+    # a new attack model from a copy of the snapshot's model. configs passed in replace the saved ones: an editable
+    #  snapshot is patched with update_attack_model(), which only rebuilds the constraint groups that differ (eg the
+    #  sequence and side constraints for a defense config that only regroups the same sections). anything it can't
+    #  patch (other sections, nodes or rosters, or a snapshot that isn't editable) is built from scratch instead. a
+    #  patched model loses its objective, since the objective depends on the old domains, so add it again afterwards
+    header = snapshot.get_header()
+    aw_config, saved_defense_config, saved_roster_set, saved_counter_config = snapshot.get_configs()
+    attack_model = AttackModel.AttackModel(aw_config, saved_defense_config, saved_roster_set, saved_counter_config,
+                                           snapshot.get_domains(), header['editable'], header['break_symmetry'],
+                                           snapshot.get_inputs())
+    model = attack_model.get_model()
+    _copy_proto(model.Proto(), snapshot.get_model().Proto())
+    if hasattr(model, 'rebuild_constant_map'):
+        # constants created from now on must not reuse indices from an empty model
+        model.rebuild_constant_map()
+    _index_from_json_data(attack_model, header['index'])
+    if defense_config is None and roster_set is None and counter_config is None:
+        return attack_model
+
+    attack_model.set_configs(defense_config if defense_config is not None else saved_defense_config,
+                             roster_set if roster_set is not None else saved_roster_set,
+                             counter_config if counter_config is not None else saved_counter_config)
+    if not AttackModel.update_attack_model(attack_model):
+        logging.info("snapshot can't be patched with these configs, building the model instead")
+        return AttackModel.build_attack_model(aw_config, attack_model.get_defense_config(),
+                                              attack_model.get_roster_set(), attack_model.get_counter_config(),
+                                              header['break_symmetry'], editable=header['editable'])
+    if model.HasObjective():
+        attack_model.retire_group(('objective',))
+        model.ClearObjective()
+
+    return attack_model
+
+
+def load_snapshot(filename: str, defense_config: DefenseConfig.DefenseConfig = None,
+                  roster_set: RosterSet.RosterSet = None,
+                  counter_config: DefenderCounterConfig.DefenderCounterConfig = None) -> AttackModel.AttackModel:
+    # loads the attack model saved by save_snapshot(), patched with any configs passed in (see
+    #  model_from_snapshot()). to make more than one model from the same file, read_snapshot() it once instead
+    return model_from_snapshot(read_snapshot(filename), defense_config, roster_set, counter_config)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)-8s %(funcName)s:%(message)s',
+                        level=logging.INFO,
+                        datefmt='%Y-%m-%d %H:%M:%S')
+
+    parser = argparse.ArgumentParser(description="save an attack model snapshot and compare loading it to building")
+    parser.add_argument('--defense', default='dc-2.json', help="defense config json file")
+    parser.add_argument('--rosters', default='rosterset-1.json', help="roster set json file")
+    parser.add_argument('--counters', default='defendercounter-1.json', help="defender counters json file")
+    parser.add_argument('--num-champions', type=int, default=250)
+    parser.add_argument('--break-symmetry', action='store_true')
+    parser.add_argument('--output', default='attack-model.awsnap', help="snapshot file to write")
+    parser.add_argument('--patch-defense', help="defense config json file to patch into the loaded snapshot")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    built_model = AttackModel.build_attack_model(AWConfig.AWConfig(args.num_champions),
+                                                 DefenseConfig.load_defense_config_from_file(args.defense),
+                                                 RosterSet.load_roster_set_from_file(args.rosters),
+                                                 DefenderCounterConfig.load_counters_from_file(args.counters),
+                                                 args.break_symmetry, editable=True)
+    build_time = time.perf_counter() - start_time
+    save_snapshot(built_model, args.output)
+    start_time = time.perf_counter()
+    patch_defense = DefenseConfig.load_defense_config_from_file(args.patch_defense) if args.patch_defense else None
+    loaded_model = load_snapshot(args.output, patch_defense)
+    load_time = time.perf_counter() - start_time
+    print("build: {:.3f} s, load: {:.3f} s, snapshot: {} bytes".format(build_time, load_time,
+                                                                       os.path.getsize(args.output)))
+    AttackModel.print_solution(loaded_model, AttackModel.solve_attack_model(loaded_model))
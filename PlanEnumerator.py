@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import logging
+import time
+import AWConfig
+import AttackModel
+import DefenseConfig
+import DefenderCounterConfig
+import RosterSet
+
+
+def _plan_key(plan: AttackModel.AttackSolution) -> tuple:
+    # team slot order doesn't make a different plan
+    assignments = plan.get_all_assignments()
+    nodes = sorted(assignments.keys())
+    teams = plan.get_all_teams()
+    return (tuple(assignments[node]['team'] for node in nodes), tuple(assignments[node]['attacker'] for node in nodes),
+            tuple(tuple(sorted(teams[roster_id])) for roster_id in sorted(teams.keys())))
+
+
+def _add_min_distance(attack_model: AttackModel.AttackModel, plan: AttackModel.AttackSolution, min_distance: int):
+    # at most (number of nodes - min_distance) nodes may keep the team they have in the plan
+    model = attack_model.get_model()
+    inputs = attack_model.get_inputs()
+    defender_team_ass_checks = attack_model.get_defender_team_ass_checks()
+    assignments = plan.get_all_assignments()
+    same_team = list(defender_team_ass_checks[inputs.get_node_section(node)][node][assignments[node]['team']]
+                     for node in assignments)
+    attack_model.add_to_group(('enumeration',), model.Add(sum(same_team) <= len(same_team) - min_distance))
+
+
+def _add_different_plan(attack_model: AttackModel.AttackModel, plan: AttackModel.AttackSolution):
+    # the next plan has to differ in some node's team or attacker, or in some team's champs. a team differs if it lacks
+    #  one of the plan's champs, whatever slot that champ was in
+    model = attack_model.get_model()
+    inputs = attack_model.get_inputs()
+    defender_assignments = attack_model.get_defender_assignments()
+    defender_team_ass_checks = attack_model.get_defender_team_ass_checks()
+    differences = []
+    for node, assignment in plan.get_all_assignments().items():
+        differences.append(defender_team_ass_checks[inputs.get_node_section(node)][node][assignment['team']].Not())
+        other_attacker = model.NewBoolVar("node {} attacker is not {}?".format(node, assignment['attacker']))
+        # OnlyEnforceIf() doesn't return the constraint in every ortools version, so keep hold of it first
+        constraint = model.Add(defender_assignments[node]['attacker'] != assignment['attacker'])
+        constraint.OnlyEnforceIf(other_attacker)
+        attack_model.add_to_group(('enumeration',), constraint)
+        differences.append(other_attacker)
+    teams = attack_model.get_teams()
+    for ii, roster_id in enumerate(attack_model.get_roster_ids()):
+        for champ in plan.get_team(roster_id):
+            champ_missing = model.NewBoolVar("team {} lacks {}?".format(roster_id, champ))
+            for slot in teams[ii]:
+                constraint = model.Add(slot != champ)
+                constraint.OnlyEnforceIf(champ_missing)
+                attack_model.add_to_group(('enumeration',), constraint)
+            differences.append(champ_missing)
+    attack_model.add_to_group(('enumeration',), model.AddBoolOr(differences))
+
+
+def enumerate_plans(attack_model: AttackModel.AttackModel, max_plans: int = 10, time_limit: float = None,
+                    min_distance: int = 0, output_file: str = None, num_workers: int = None):
+    # yields plans one at a time, until max_plans were yielded, the time limit for the whole search runs out, no other
+    #  plan is left or the caller stops iterating. min_distance is the number of nodes a plan has to assign to a
+    #  different team than every plan before it. each plan is also appended to output_file as a json line when it is
+    #  yielded. after each plan the model gets a constraint that rules it out (or everything within min_distance of
+    #  it) and is solved again, so every solve goes straight to a new plan instead of wading through near copies of
+    #  the last one. a model with an objective gives the best plan that is left each time. the added constraints are
+    #  retired once the generator finishes, and solving never changes the model otherwise
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    seen_keys = set()
+    num_plans = 0
+    f = open(output_file, 'a') if output_file else None
+    try:
+        while num_plans < max_plans:
+            remaining = deadline - time.perf_counter() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                break
+            plan = AttackModel.solve_attack_model(attack_model, remaining, num_workers)
+            if not plan.is_feasible():
+                logging.info("search done: {} after {} plans".format(plan.get_status_name(), num_plans))
+                break
+            if min_distance > 0:
+                _add_min_distance(attack_model, plan, min_distance)
+            else:
+                _add_different_plan(attack_model, plan)
+            # the constraints above already rule out repeats, this only guards against them
+            key = _plan_key(plan)
+            if key in seen_keys:
+                continue
+            seen_keys.add(key)
+
+            if f is not None:
+                json_data = AttackModel.solution_to_json_data(plan)
+                json_data['plan_index'] = num_plans
+                f.write(json.dumps(json_data) + '\n')
+                f.flush()
+            num_plans += 1
+            yield plan
+    finally:
+        attack_model.retire_group(('enumeration',))
+        if f is not None:
+            f.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)-8s %(funcName)s:%(message)s',
+                        level=logging.INFO,
+                        datefmt='%Y-%m-%d %H:%M:%S')
+
+    parser = argparse.ArgumentParser(description="find several different attack plans")
+    parser.add_argument('--defense', default='dc-2.json', help="defense config json file")
+    parser.add_argument('--rosters', default='rosterset-1.json', help="roster set json file")
+    parser.add_argument('--counters', default='defendercounter-1.json', help="defender counters json file")
+    parser.add_argument('--num-champions', type=int, default=250)
+    parser.add_argument('--max-plans', type=int, default=5)
+    parser.add_argument('--time-limit', type=float, default=60.0, help="time limit for the whole search, in seconds")
+    parser.add_argument('--min-distance', type=int, default=0,
+                        help="number of nodes each plan must assign to a different team than all earlier plans")
+    parser.add_argument('--output', default='plans.jsonl', help="json lines file the plans are appended to")
+    args = parser.parse_args()
+
+    # interchangeable team slots and rosters only slow down each search, the plans are compared without them
+    model_to_enumerate = AttackModel.build_attack_model(AWConfig.AWConfig(args.num_champions),
+                                                        DefenseConfig.load_defense_config_from_file(args.defense),
+                                                        RosterSet.load_roster_set_from_file(args.rosters),
+                                                        DefenderCounterConfig.load_counters_from_file(args.counters),
+                                                        break_symmetry=True)
+    for plan_num, found_plan in enumerate(enumerate_plans(model_to_enumerate, args.max_plans, args.time_limit,
+                                                          args.min_distance, args.output)):
+        print("plan {} found in {:.3f} s".format(plan_num, found_plan.get_wall_time()))
+        AttackModel.print_solution(model_to_enumerate, found_plan)
@@ -0,0 +1,150 @@
+import copy
+import logging
+import AWConfig
+import AttackModel
+import AttackObjective
+import DefenseConfig
+import DefenderCounterConfig
+import RosterSet
+
+
+class PlanSession:
+    # keeps one editable model alive across small edits (a roster change, new counters for a node, a section moved to
+    #  another sequence or side), so a what-if re-solve only rebuilds the constraints the edit touched and starts from
+    #  the last plan. edits go to the session's own copies of the configs and are applied to the model on the next solve
+    _aw_config: AWConfig.AWConfig
+    _defense_config: DefenseConfig.DefenseConfig
+    _roster_set: RosterSet.RosterSet
+    _counter_config: DefenderCounterConfig.DefenderCounterConfig
+    _break_symmetry: bool
+    _objective_config: AttackObjective.ObjectiveConfig
+    _max_retired: int
+    _attack_model: AttackModel.AttackModel
+    _needs_update: bool
+    _needs_rebuild: bool
+    _last_solution: AttackModel.AttackSolution
+    _num_rebuilds: int
+
+    def __init__(self, aw_config: AWConfig.AWConfig, defense_config: DefenseConfig.DefenseConfig,
+                 roster_set: RosterSet.RosterSet, counter_config: DefenderCounterConfig.DefenderCounterConfig,
+                 break_symmetry: bool = False, objective_config: AttackObjective.ObjectiveConfig = None,
+                 max_retired: int = 5000):
+        self._aw_config = aw_config
+        self._defense_config = copy.deepcopy(defense_config)
+        self._roster_set = copy.deepcopy(roster_set)
+        self._counter_config = copy.deepcopy(counter_config)
+        self._break_symmetry = break_symmetry
+        self._objective_config = objective_config
+        # retired constraints stay in the model, so after this many it's cheaper to start over
+        self._max_retired = max_retired
+        self._last_solution = None
+        self._num_rebuilds = 0
+        self._rebuild()
+
+    def _rebuild(self):
+        self._attack_model = AttackModel.build_attack_model(self._aw_config, self._defense_config, self._roster_set,
+                                                            self._counter_config, self._break_symmetry, editable=True)
+        self._num_rebuilds += 1
+        self._needs_update = False
+        self._needs_rebuild = False
+        if self._objective_config is not None and not self._objective_config.is_empty():
+            AttackObjective.add_objective(self._attack_model, self._objective_config)
+
+    def get_attack_model(self) -> AttackModel.AttackModel:
+        return self._attack_model
+
+    def get_defense_config(self) -> DefenseConfig.DefenseConfig:
+        return self._defense_config
+
+    def get_roster_set(self) -> RosterSet.RosterSet:
+        return self._roster_set
+
+    def get_counter_config(self) -> DefenderCounterConfig.DefenderCounterConfig:
+        return self._counter_config
+
+    def get_last_solution(self) -> AttackModel.AttackSolution:
+        return self._last_solution
+
+    def get_num_rebuilds(self) -> int:
+        return self._num_rebuilds
+
+    def update_roster(self, roster_id: int, champs: list):
+        self._roster_set.update_roster(roster_id, champs)
+        self._needs_update = True
+
+    def add_roster(self, champs: list):
+        # a new roster means new team variables everywhere, so this one always rebuilds
+        self._roster_set.add_roster(champs)
+        self._needs_rebuild = True
+
+    def update_counters(self, node_id: int, counters: list):
+        self._counter_config.update_counters(node_id, counters)
+        self._needs_update = True
+
+    def set_sequence_num(self, section_name: str, sequence_num: int):
+        self._defense_config.get_section(section_name).set_sequence_num(sequence_num)
+        self._needs_update = True
+
+    def set_side_num(self, section_name: str, side_num: int):
+        self._defense_config.get_section(section_name).set_side_num(side_num)
+        self._needs_update = True
+
+    def set_objective(self, objective_config: AttackObjective.ObjectiveConfig):
+        # None drops the objective, so the session goes back to finding any feasible plan
+        self._objective_config = objective_config
+        if objective_config is None:
+            self._attack_model.retire_group(('objective',))
+            self._attack_model.get_model().ClearObjective()
+        else:
+            AttackObjective.add_objective(self._attack_model, objective_config)
+
+    def _apply_edits(self):
+        if self._needs_rebuild:
+            logging.info("rebuilding model")
+            self._rebuild()
+            return
+        if not self._needs_update:
+            return
+
+        if not AttackModel.update_attack_model(self._attack_model):
+            logging.info("edits can't be applied in place, rebuilding model")
+            self._rebuild()
+            return
+        self._needs_update = False
+        if self._attack_model.get_num_retired() > self._max_retired:
+            logging.info("{} retired constraints, rebuilding model".format(self._attack_model.get_num_retired()))
+            self._rebuild()
+            return
+        # the objective's terms depend on the domains, so it's rebuilt along with them
+        if self._objective_config is not None and not self._objective_config.is_empty():
+            AttackObjective.add_objective(self._attack_model, self._objective_config)
+
+    def solve(self, time_limit: float = None, num_workers: int = None) -> AttackModel.AttackSolution:
+        self._apply_edits()
+        # start from the last plan. values the edits ruled out are dropped from the hint
+        if self._last_solution is not None and self._last_solution.get_all_teams():
+            AttackModel.add_solution_hint(self._attack_model, self._last_solution)
+        solution = AttackModel.solve_attack_model(self._attack_model, time_limit, num_workers)
+        if solution.is_feasible():
+            self._last_solution = solution
+
+        return solution
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)-8s %(funcName)s:%(message)s',
+                        level=logging.INFO,
+                        datefmt='%Y-%m-%d %H:%M:%S')
+
+    dc = DefenseConfig.load_defense_config_from_file("dc-2.json")
+    rs = RosterSet.load_roster_set_from_file("rosterset-1.json")
+    dcc = DefenderCounterConfig.load_counters_from_file("defendercounter-1.json")
+    session = PlanSession(AWConfig.AWConfig(250), dc, rs, dcc)
+    AttackModel.print_solution(session.get_attack_model(), session.solve())
+
+    # what if the first roster lost the first champ on its team
+    first_team = session.get_last_solution().get_team(0)
+    if first_team:
+        session.update_roster(0, list(x for x in session.get_roster_set().get_roster(0) if x != first_team[0]))
+        print("after removing champ {} from roster 0:".format(first_team[0]))
+        AttackModel.print_solution(session.get_attack_model(), session.solve())
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+
+import argparse
+import collections
+import concurrent.futures
+import http.server
+import itertools
+import json
+import logging
+import os
+import threading
+import AWConfig
+import AttackModel
+import AttackObjective
+import BatchPlanner
+import DefenseConfig
+import DefenderCounterConfig
+import RosterSet
+
+from ortools.sat.python import cp_model
+
+# config kinds a plan request can give, with the loaders for a file path and for inline json data
+_CONFIG_LOADERS = {
+    'defense': (DefenseConfig.load_defense_config_from_file, DefenseConfig.defense_config_from_json_data),
+    'rosters': (RosterSet.load_roster_set_from_file, RosterSet.roster_set_from_json_data),
+    'counters': (DefenderCounterConfig.load_counters_from_file, DefenderCounterConfig.counters_from_json_data)
+}
+
+
+class _PlanJob:
+    # one plan request. the status goes queued -> running -> done, or ends up cancelled or failed. the solve thread and
+    #  the request threads only change it through the methods below, which all hold the job's lock
+    _job_id: str
+    _status: str
+    _time_limit: float
+    _solution: AttackModel.AttackSolution
+    _error: str
+    _solver: cp_model.CpSolver
+    _cancel_requested: bool
+    _done_event: threading.Event
+    _future: concurrent.futures.Future
+    _lock: threading.Lock
+
+    def __init__(self, job_id: str, time_limit: float):
+        self._job_id = job_id
+        self._status = 'queued'
+        self._time_limit = time_limit
+        self._solution = None
+        self._error = None
+        self._solver = None
+        self._cancel_requested = False
+        self._done_event = threading.Event()
+        self._future = None
+        self._lock = threading.Lock()
+
+    def get_job_id(self) -> str:
+        return self._job_id
+
+    def get_status(self) -> str:
+        with self._lock:
+            return self._status
+
+    def get_time_limit(self) -> float:
+        return self._time_limit
+
+    def get_solution(self) -> AttackModel.AttackSolution:
+        with self._lock:
+            return self._solution
+
+    def is_done(self) -> bool:
+        return self._done_event.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._done_event.wait(timeout)
+
+    def set_future(self, future: concurrent.futures.Future):
+        with self._lock:
+            self._future = future
+
+    def _end(self, status: str):
+        # call with the lock held
+        self._solver = None
+        self._status = status
+        self._done_event.set()
+
+    def start(self) -> bool:
+        # queued -> running. False if the job was cancelled before it got to run
+        with self._lock:
+            if self._cancel_requested:
+                self._end('cancelled')
+                return False
+            self._status = 'running'
+            return True
+
+    def attach_solver(self, solver: cp_model.CpSolver) -> bool:
+        # the solver cancel() stops. False if the job was cancelled while its model was being built
+        with self._lock:
+            if self._cancel_requested:
+                self._end('cancelled')
+                return False
+            self._solver = solver
+            return True
+
+    def finish(self, solution: AttackModel.AttackSolution):
+        with self._lock:
+            self._solution = solution
+            # a cancelled solve still returns whatever it found so far
+            self._end('cancelled' if self._cancel_requested else 'done')
+
+    def fail(self, error: str):
+        with self._lock:
+            self._error = error
+            self._end('failed')
+
+    def cancel(self) -> bool:
+        # stops a running solve, or keeps a queued one from starting. False if the job already finished
+        with self._lock:
+            if self._done_event.is_set():
+                return False
+            self._cancel_requested = True
+            if self._future is not None and self._future.cancel():
+                self._end('cancelled')
+            elif self._solver is not None:
+                # StopSearch() does nothing until the search has actually started, the zero time limit stops a solve
+                #  that hasn't got that far yet
+                self._solver.parameters.max_time_in_seconds = 0
+                self._solver.StopSearch()
+            return True
+
+    def to_json_data(self) -> dict:
+        with self._lock:
+            json_data = {'job_id': self._job_id, 'status': self._status, 'time_limit': self._time_limit}
+            if self._solution is not None:
+                json_data['solution'] = AttackModel.solution_to_json_data(self._solution)
+            if self._error is not None:
+                json_data['error'] = self._error
+        return json_data
+
+
+class PlannerService:
+    # keeps ortools loaded and the config files parsed between plan requests. solves run in a bounded thread pool
+    #  (cp-sat releases the gil while it searches), all sharing the cached configs, which solving never modifies
+    _config_dir: str
+    _default_files: dict[str, str]
+    _num_champions: int
+    _default_time_limit: float
+    _max_time_limit: float
+    _solver_workers: int
+    _max_pending: int
+    _max_jobs: int
+    _executor: concurrent.futures.ThreadPoolExecutor
+    _lock: threading.Lock
+    _configs: dict[str, tuple]
+    _jobs: collections.OrderedDict
+    _job_ids: itertools.count
+
+    def __init__(self, config_dir: str = '.', default_files: dict[str, str] = None, num_champions: int = 250,
+                 pool_size: int = None, solver_workers: int = None, default_time_limit: float = 30.0,
+                 max_time_limit: float = 300.0, max_pending: int = 32, max_jobs: int = 1000):
+        # resolved the same way as request paths, so a symlinked config dir still passes the containment check
+        self._config_dir = os.path.realpath(config_dir)
+        self._default_files = default_files if default_files else {}
+        self._num_champions = num_champions
+        self._default_time_limit = default_time_limit
+        self._max_time_limit = max_time_limit
+        pool_size, self._solver_workers = BatchPlanner.split_cores(max_pending, pool_size=pool_size,
+                                                                   solver_workers=solver_workers)
+        self._max_pending = max_pending
+        # finished jobs are kept around for GET requests, oldest dropped first
+        self._max_jobs = max_jobs
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=pool_size)
+        self._lock = threading.Lock()
+        self._configs = {}
+        self._jobs = collections.OrderedDict()
+        self._job_ids = itertools.count(1)
+        logging.info("planner service with {} solve threads, {} solver workers each".format(pool_size,
+                                                                                            self._solver_workers))
+
+    def _resolve_path(self, filename: str) -> str:
+        # request paths are relative to the config dir and can't leave it
+        path = os.path.realpath(os.path.join(self._config_dir, filename))
+        if os.path.commonpath([path, self._config_dir]) != self._config_dir:
+            logging.error("config file {} is outside of {}".format(filename, self._config_dir))
+            raise ValueError("config file outside of the config dir")
+        return path
+
+    def get_config(self, kind: str, source):
+        # source is a file name, json data in the same layout as the file, or None for the service default. parsed
+        #  files are cached until they change on disk
+        if source is None:
+            if kind not in self._default_files:
+                raise ValueError("no {} config given and no default".format(kind))
+            source = self._default_files[kind]
+        file_loader, json_loader = _CONFIG_LOADERS[kind]
+        if isinstance(source, dict):
+            return json_loader(source)
+        if not isinstance(source, str):
+            raise ValueError("{} config must be a file name or json data".format(kind))
+
+        path = self._resolve_path(source)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            raise ValueError("can't read {} config {}".format(kind, source))
+        with self._lock:
+            cached = self._configs.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        config = file_loader(path)
+        with self._lock:
+            self._configs[path] = (mtime, config)
+        return config
+
+    def submit(self, request_data: dict) -> _PlanJob:
+        # raises ValueError for a bad request. returns None if too many jobs are already waiting
+        if not isinstance(request_data, dict):
+            raise ValueError("plan request must be a json object")
+        defense_config = self.get_config('defense', request_data.get('defense'))
+        roster_set = self.get_config('rosters', request_data.get('rosters'))
+        counter_config = self.get_config('counters', request_data.get('counters'))
+        aw_config = AWConfig.AWConfig(int(request_data.get('num_champions', self._num_champions)))
+        time_limit = min(float(request_data.get('time_limit', self._default_time_limit)), self._max_time_limit)
+        objective_config = None
+        if 'objective' in request_data:
+            objective_data = request_data['objective']
+            if not isinstance(objective_data, dict):
+                raise ValueError("objective must be a json object")
+            objective_config = AttackObjective.ObjectiveConfig(int(objective_data.get('distinct_teams_weight', 0)),
+                                                               int(objective_data.get('counter_rank_weight', 0)),
+                                                               int(objective_data.get('load_balance_weight', 0)))
+        break_symmetry = bool(request_data.get('break_symmetry', False))
+
+        with self._lock:
+            num_pending = sum(1 for job in self._jobs.values() if not job.is_done())
+            if num_pending >= self._max_pending:
+                return None
+            job = _PlanJob(str(next(self._job_ids)), time_limit)
+            self._jobs[job.get_job_id()] = job
+            while len(self._jobs) > self._max_jobs:
+                oldest_id = next(iter(self._jobs))
+                if not self._jobs[oldest_id].is_done():
+                    break
+                del self._jobs[oldest_id]
+            job.set_future(self._executor.submit(self._run_job, job, aw_config, defense_config, roster_set,
+                                                 counter_config, objective_config, break_symmetry))
+        return job
+
+    def _run_job(self, job: _PlanJob, aw_config: AWConfig.AWConfig, defense_config: DefenseConfig.DefenseConfig,
+                 roster_set: RosterSet.RosterSet, counter_config: DefenderCounterConfig.DefenderCounterConfig,
+                 objective_config: AttackObjective.ObjectiveConfig, break_symmetry: bool):
+        try:
+            if not job.start():
+                return
+            attack_model = AttackModel.build_attack_model(aw_config, defense_config, roster_set, counter_config,
+                                                          break_symmetry)
+            if objective_config is not None and not objective_config.is_empty():
+                AttackObjective.add_objective(attack_model, objective_config)
+            # the limits are set before cancel() can see the solver, so its zero time limit isn't overwritten
+            solver = cp_model.CpSolver()
+            solver.parameters.max_time_in_seconds = job.get_time_limit()
+            solver.parameters.num_workers = self._solver_workers
+            if not job.attach_solver(solver):
+                return
+            solution = AttackModel.solve_attack_model(attack_model, solver=solver)
+            job.finish(solution)
+            logging.info("job {}: {} in {:.3f} s".format(job.get_job_id(), solution.get_status_name(),
+                                                         solution.get_wall_time()))
+        except Exception as e:
+            logging.exception("job {} failed".format(job.get_job_id()))
+            job.fail(str(e))
+
+    def get_job(self, job_id: str) -> _PlanJob:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        # stops a running solve, or keeps a queued one from starting. False if there is no such job or it already
+        #  finished
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job is not None and job.cancel()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            statuses = collections.Counter(job.get_status() for job in self._jobs.values())
+            return {'jobs': dict(statuses), 'cached_configs': len(self._configs)}
+
+    def shutdown(self):
+        with self._lock:
+            job_ids = list(self._jobs.keys())
+        for job_id in job_ids:
+            self.cancel(job_id)
+        self._executor.shutdown(wait=True)
+
+
+class _PlannerRequestHandler(http.server.BaseHTTPRequestHandler):
+    # POST /plans starts a plan (and by default waits for it), GET /plans/<id> polls it, DELETE /plans/<id>
+    #  cancels it, GET /health reports the job counts
+    server: http.server.ThreadingHTTPServer
+
+    def log_message(self, format, *args):
+        logging.debug("{} {}".format(self.address_string(), format % args))
+
+    def _send_json(self, code: int, json_data: dict):
+        body = json.dumps(json_data).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _job_id_from_path(self) -> str:
+        parts = self.path.strip('/').split('/')
+        if len(parts) == 2 and parts[0] == 'plans':
+            return parts[1]
+        return None
+
+    def do_GET(self):
+        service = self.server.planner_service
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', **service.get_stats()})
+            return
+        job = service.get_job(self._job_id_from_path())
+        if job is None:
+            self._send_json(404, {'error': "unknown job"})
+            return
+        self._send_json(200, job.to_json_data())
+
+    def do_POST(self):
+        if self.path != '/plans':
+            self._send_json(404, {'error': "unknown path"})
+            return
+        service = self.server.planner_service
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request_data = json.loads(self.rfile.read(length)) if length else {}
+            job = service.submit(request_data)
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        if job is None:
+            self._send_json(503, {'error': "too many pending plans"})
+            return
+        if request_data.get('wait', True):
+            job.wait()
+            self._send_json(200, job.to_json_data())
+        else:
+            self._send_json(202, job.to_json_data())
+
+    def do_DELETE(self):
+        service = self.server.planner_service
+        job_id = self._job_id_from_path()
+        if service.get_job(job_id) is None:
+            self._send_json(404, {'error': "unknown job"})
+            return
+        cancelled = service.cancel(job_id)
+        self._send_json(200, {'job_id': job_id, 'cancelled': cancelled})
+
+
+def make_server(service: PlannerService, host: str = '127.0.0.1',
+                port: int = 8765) -> http.server.ThreadingHTTPServer:
+    # port 0 picks a free port, see server.server_address
+    server = http.server.ThreadingHTTPServer((host, port), _PlannerRequestHandler)
+    server.daemon_threads = True
+    server.planner_service = service
+    return server
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)-8s %(funcName)s:%(message)s',
+                        level=logging.INFO,
+                        datefmt='%Y-%m-%d %H:%M:%S')
+
+    parser = argparse.ArgumentParser(description="serve attack plans over a local http/json api")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--config-dir', default='.', help="directory config file names in requests are relative to")
+    parser.add_argument('--defense', help="default defense config file")
+    parser.add_argument('--rosters', default='rosterset-1.json', help="default roster set file")
+    parser.add_argument('--counters', default='defendercounter-1.json', help="default defender counters file")
+    parser.add_argument('--num-champions', type=int, default=250)
+    parser.add_argument('--pool-size', type=int, help="number of plans solved at once")
+    parser.add_argument('--solver-workers', type=int, help="cp-sat workers per solve")
+    parser.add_argument('--time-limit', type=float, default=30.0, help="default time limit per plan, in seconds")
+    parser.add_argument('--max-time-limit', type=float, default=300.0, help="cap on requested time limits")
+    parser.add_argument('--max-pending', type=int, default=32, help="queued and running plans before rejecting more")
+    args = parser.parse_args()
+
+    defaults = {kind: filename for kind, filename in
+                [('defense', args.defense), ('rosters', args.rosters), ('counters', args.counters)] if filename}
+    planner_service = PlannerService(args.config_dir, defaults, args.num_champions, args.pool_size,
+                                     args.solver_workers, args.time_limit, args.max_time_limit, args.max_pending)
+    # parse the defaults now rather than on the first request
+    for default_kind in defaults:
+        planner_service.get_config(default_kind, None)
+    http_server = make_server(planner_service, args.host, args.port)
+    logging.info("listening on {}:{}".format(*http_server.server_address[:2]))
+    try:
+        http_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        http_server.server_close()
+        planner_service.shutdown()
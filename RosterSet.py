@@ -24,18 +24,35 @@ class RosterSet:
     def add_roster(self, champs: list):
         self._roster_data.append(champs)
 
+    def update_roster(self, roster_id: int, champs: list):
+        if roster_id not in range(len(self._roster_data)):
+            logging.error("invalid roster id {}".format(roster_id))
+            raise ValueError("unknown roster id")
+
+        self._roster_data[roster_id] = champs
+
 
 def load_roster_set_from_file(filename: str) -> RosterSet:
-    roster_set = RosterSet()
     with open(filename) as f:
         json_data = json.load(f)
 
+    return roster_set_from_json_data(json_data)
+
+
+def roster_set_from_json_data(json_data: dict) -> RosterSet:
+    # same layout as the roster set files
+    roster_set = RosterSet()
     for roster in json_data['rosters']:
         roster_set.add_roster(roster)
 
     return roster_set
 
 
+def roster_set_to_json_data(roster_set: RosterSet) -> dict:
+    # same layout as the roster set files
+    return {'rosters': list(roster_set.get_roster(roster_id) for roster_id in roster_set.get_all_roster_ids())}
+
+
 if __name__ == '__main__':
     logging.basicConfig(format='%(asctime)s %(levelname)-8s %(funcName)s:%(message)s',
                         level=logging.INFO,
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import AWConfig
+import AttackModel
+import DefenseConfig
+import DefenderCounterConfig
+import RosterSet
+
+from ortools.sat.python import cp_model
+
+# solutions worth reusing. anything else (eg UNKNOWN after a time limit) should be solved again
+_CACHEABLE_STATUSES = [cp_model.OPTIMAL, cp_model.FEASIBLE, cp_model.INFEASIBLE]
+
+
+def canonical_inputs(aw_config: AWConfig.AWConfig, defense_config: DefenseConfig.DefenseConfig,
+                     roster_set: RosterSet.RosterSet, counter_config: DefenderCounterConfig.DefenderCounterConfig,
+                     options: dict = None) -> dict:
+    # json-able form of everything that affects the solution. roster order is kept since roster ids are indices, and
+    #  counter order is kept since it ranks the counters. section names and node order don't affect the solution
+    sections = []
+    for section_name in defense_config.get_all_sections():
+        section = defense_config.get_section(section_name)
+        sections.append({'nodes': sorted(section.get_nodes()), 'sequence_num': section.get_sequence_num(),
+                         'side_num': section.get_side_num()})
+    sections.sort(key=lambda x: json.dumps(x, sort_keys=True))
+
+    return {
+        'aw_config': {'num_champions': aw_config.get_num_champions(), 'num_rosters': aw_config.get_num_rosters(),
+                      'team_size': aw_config.get_team_size()},
+        'rosters': list(sorted(roster_set.get_roster(roster_id)) for roster_id in roster_set.get_all_roster_ids()),
+        'counters': list({'node_id': node_id, 'counters': counter_config.get_node_counters(node_id)}
+                         for node_id in sorted(counter_config.get_node_ids())),
+        'sections': sections,
+        'options': options if options else {}
+    }
+
+
+def inputs_key(inputs: dict) -> str:
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+
+def _similarity(inputs: dict, other_inputs: dict) -> int:
+    # number of rosters (by position), node counters and sections the two inputs have in common
+    if inputs['aw_config'] != other_inputs['aw_config'] or inputs['options'] != other_inputs['options']:
+        return 0
+    score = sum(1 for lhs, rhs in zip(inputs['rosters'], other_inputs['rosters']) if lhs == rhs)
+    for field in ['counters', 'sections']:
+        items = set(json.dumps(x, sort_keys=True) for x in inputs[field])
+        other_items = set(json.dumps(x, sort_keys=True) for x in other_inputs[field])
+        score += len(items & other_items)
+
+    return score
+
+
+class SolutionCache:
+    # one json file per solved input, named by the hash of the canonical inputs. file modification times are the lru
+    #  order: reads touch the file, and writes evict the least recently used files beyond max_entries
+    _cache_dir: str
+    _max_entries: int
+
+    def __init__(self, cache_dir: str, max_entries: int = 256):
+        self._cache_dir = cache_dir
+        self._max_entries = max_entries
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, key + '.json')
+
+    def _entry_paths(self) -> list:
+        return list(os.path.join(self._cache_dir, x) for x in os.listdir(self._cache_dir) if x.endswith('.json'))
+
+    def get(self, inputs: dict) -> AttackModel.AttackSolution:
+        # returns None on a cache miss
+        entry_path = self._entry_path(inputs_key(inputs))
+        try:
+            with open(entry_path) as f:
+                json_data = json.load(f)
+            os.utime(entry_path)
+        except (OSError, ValueError):
+            return None
+
+        return AttackModel.solution_from_json_data(json_data['solution'])
+
+    def put(self, inputs: dict, solution: AttackModel.AttackSolution) -> bool:
+        # returns whether the solution was stored
+        if solution.get_status() not in _CACHEABLE_STATUSES:
+            return False
+
+        json_data = {'inputs': inputs, 'solution': AttackModel.solution_to_json_data(solution)}
+        # write to a temp file first so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(json_data, f)
+        os.replace(tmp_path, self._entry_path(inputs_key(inputs)))
+        self._evict()
+        return True
+
+    def get_closest_feasible(self, inputs: dict) -> AttackModel.AttackSolution:
+        # the cached feasible solution with the most in common with the inputs, for use as a solution hint. returns None
+        #  if no cached solution shares anything with the inputs
+        best_score = 0
+        best_solution = None
+        for entry_path in self._entry_paths():
+            try:
+                with open(entry_path) as f:
+                    json_data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if json_data['solution']['status'] not in ['OPTIMAL', 'FEASIBLE']:
+                continue
+            score = _similarity(inputs, json_data['inputs'])
+            if score > best_score:
+                best_score = score
+                best_solution = json_data['solution']
+
+        if best_solution is None:
+            return None
+
+        return AttackModel.solution_from_json_data(best_solution)
+
+    def _evict(self):
+        entry_paths = self._entry_paths()
+        if len(entry_paths) <= self._max_entries:
+            return
+        entry_paths.sort(key=lambda x: os.stat(x).st_mtime)
+        for entry_path in entry_paths[:len(entry_paths) - self._max_entries]:
+            try:
+                os.remove(entry_path)
+            except OSError:
+                # another process evicted it first
+                pass
+
+
+def cached_solve(cache: SolutionCache, aw_config: AWConfig.AWConfig, defense_config: DefenseConfig.DefenseConfig,
+                 roster_set: RosterSet.RosterSet, counter_config: DefenderCounterConfig.DefenderCounterConfig,
+                 time_limit: float = None, num_workers: int = None,
+                 build_model: callable = None) -> AttackModel.AttackSolution:
+    # returns the cached solution for these inputs if there is one, otherwise solves (hinted with the closest cached
+    #  solution) and caches the result. build_model() makes the model to solve on a miss, eg from a snapshot. it must
+    #  be a model of these same configs, and defaults to building one from them
+    inputs = canonical_inputs(aw_config, defense_config, roster_set, counter_config)
+    solution = cache.get(inputs)
+    if solution is not None:
+        logging.info("cache hit for {}".format(inputs_key(inputs)))
+        return solution
+
+    if build_model is None:
+        attack_model = AttackModel.build_attack_model(aw_config, defense_config, roster_set, counter_config)
+    else:
+        attack_model = build_model()
+    hint = cache.get_closest_feasible(inputs)
+    if hint is not None:
+        AttackModel.add_solution_hint(attack_model, hint)
+    solution = AttackModel.solve_attack_model(attack_model, time_limit, num_workers)
+    cache.put(inputs, solution)
+
+    return solution